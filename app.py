@@ -3,9 +3,10 @@ import pandas as pd
 from pathlib import Path
 from datetime import datetime, date
 from dateutil.relativedelta import relativedelta
-import io, zipfile, os
 
 import db
+import kpis
+import reports
 
 UPLOAD_DIR = Path("data") / "uploads"
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
@@ -127,6 +128,12 @@ def admin_panel():
 
 
 # ----------------- DATA ENTRY -----------------
+def _pick(options, value):
+    return options.index(value) if value in options else 0
+
+def _as_date(value):
+    return date.fromisoformat(str(value)[:10]) if value else None
+
 def data_entry():
     st.header("Data Entry")
 
@@ -141,65 +148,104 @@ def data_entry():
         st.warning("Admin must add Masters first: Laundry/Factory/Department/Customer/Wash Category.")
         return
 
-    with st.form("entry_form", clear_on_submit=True):
+    # Resubmitting a Style/Contract/Laundry updates that entry instead of adding a duplicate
+    with st.expander("🔍 Find existing entry (Style No + Contract No + Laundry)"):
+        f1, f2, f3, f4 = st.columns([1, 1, 1, 0.5])
+        with f1:
+            find_style = st.text_input("Style No", key="find_style")
+        with f2:
+            find_contract = st.text_input("Contract No", key="find_contract")
+        with f3:
+            find_laundry = st.selectbox("Laundry", laundries, key="find_laundry")
+        with f4:
+            st.write("")
+            if st.button("Find"):
+                style, contract = find_style.strip(), find_contract.strip()
+                st.session_state.pop("entry_prefill", None)
+                if not style or not contract:
+                    # blank keys are never updated in place, so there is nothing to edit
+                    st.warning("Enter both Style No and Contract No to find an entry.")
+                elif db.entry_archived(style, contract, find_laundry):
+                    st.warning("This entry is archived (closed period) and can no longer be changed.")
+                else:
+                    found = db.find_entry(style, contract, find_laundry)
+                    if found:
+                        st.session_state.entry_prefill = found
+                    else:
+                        st.info("No existing entry found.")
+
+    pre = st.session_state.get("entry_prefill") or {}
+    if pre:
+        st.info(f"Editing entry saved {pre['created_at']} by {pre['created_by']}. Saving will update it.")
+        if st.button("Start a new entry instead"):
+            st.session_state.pop("entry_prefill", None)
+            st.rerun()
+    # new widget keys per loaded entry so the prefilled defaults take effect
+    sfx = f"_{pre['id']}" if pre else ""
+
+    with st.form(f"entry_form{sfx}", clear_on_submit=True):
         colA, colB, colC = st.columns(3)
 
         with colA:
-            customer_name = st.selectbox("Customer", customers)
-            style_no = st.text_input("Style No")
-            contract_no = st.text_input("Contract No")
+            customer_name = st.selectbox("Customer", customers, index=_pick(customers, pre.get("customer_name")))
+            style_no = st.text_input("Style No", value=pre.get("style_no") or "")
+            contract_no = st.text_input("Contract No", value=pre.get("contract_no") or "")
 
-            customer_order_qty = st.number_input("UK(Customer) Order Qty", min_value=0, step=1)
-            factory_order_qty = st.number_input("Factory Order Qty", min_value=0, step=1)
+            customer_order_qty = st.number_input("UK(Customer) Order Qty", min_value=0, step=1, value=int(pre.get("customer_order_qty") or 0))
+            factory_order_qty = st.number_input("Factory Order Qty", min_value=0, step=1, value=int(pre.get("factory_order_qty") or 0))
 
-            wash_receive_qty = st.number_input("Wash Receive Qty", min_value=0, step=1)
-            wash_delivery_qty = st.number_input("Wash Delivery Qty", min_value=0, step=1)
+            wash_receive_qty = st.number_input("Wash Receive Qty", min_value=0, step=1, value=int(pre.get("wash_receive_qty") or 0))
+            wash_delivery_qty = st.number_input("Wash Delivery Qty", min_value=0, step=1, value=int(pre.get("wash_delivery_qty") or 0))
 
-            total_shipment_qty = st.number_input("Total Shipment Qty", min_value=0, step=1)
+            total_shipment_qty = st.number_input("Total Shipment Qty", min_value=0, step=1, value=int(pre.get("total_shipment_qty") or 0))
 
 
         with colB:
-            factory_name = st.selectbox("Factory", factories)
-            laundry_name = st.selectbox("Laundry", laundries)
-            department_name = st.selectbox("Department", departments)
+            factory_name = st.selectbox("Factory", factories, index=_pick(factories, pre.get("factory_name")))
+            laundry_name = st.selectbox("Laundry", laundries, index=_pick(laundries, pre.get("laundry_name")))
+            department_name = st.selectbox("Department", departments, index=_pick(departments, pre.get("department_name")))
 
-            wash_category = st.selectbox("Wash Category", wash_categories)
+            wash_category = st.selectbox("Wash Category", wash_categories, index=_pick(wash_categories, pre.get("wash_category")))
 
             # ✅ PCD Date removed; planned & actual kept
-            planned_pcd_date = st.date_input("Planned PCD Date", value=None, key="planned_pcd")
-            actual_pcd_date = st.date_input("Actual PCD Date", value=None, key="actual_pcd")
+            planned_pcd_date = st.date_input("Planned PCD Date", value=_as_date(pre.get("planned_pcd_date")), key=f"planned_pcd{sfx}")
+            actual_pcd_date = st.date_input("Actual PCD Date", value=_as_date(pre.get("actual_pcd_date")), key=f"actual_pcd{sfx}")
 
             # ✅ Dates
-            wash_receive_date = st.date_input("Wash Receive Date", value=None, key="wash_receive_date")
+            wash_receive_date = st.date_input("Wash Receive Date", value=_as_date(pre.get("wash_receive_date")), key=f"wash_receive_date{sfx}")
 
-            shade_band_submission_date = st.date_input("Shade Band Submission Date", value=None, key="sb_submit")
-            shade_band_approval_date = st.date_input("Shade Band Approval Date", value=None, key="sb_approval")
+            shade_band_submission_date = st.date_input("Shade Band Submission Date", value=_as_date(pre.get("shade_band_submission_date")), key=f"sb_submit{sfx}")
+            shade_band_approval_date = st.date_input("Shade Band Approval Date", value=_as_date(pre.get("shade_band_approval_date")), key=f"sb_approval{sfx}")
 
             # ✅ Wash Closing Date এখন approval এর পরে
-            wash_closing_date = st.date_input("Wash Closing Date", value=None, key="wash_closing_date")
+            wash_closing_date = st.date_input("Wash Closing Date", value=_as_date(pre.get("wash_closing_date")), key=f"wash_closing_date{sfx}")
 
 
-            agreed_ex_factory = st.date_input("Agreed Ex Factory", value=None, key="agreed_ex_factory")
-            actual_ex_factory = st.date_input("Actual Ex Factory", value=None, key="actual_ex_factory")
+            agreed_ex_factory = st.date_input("Agreed Ex Factory", value=_as_date(pre.get("agreed_ex_factory")), key=f"agreed_ex_factory{sfx}")
+            actual_ex_factory = st.date_input("Actual Ex Factory", value=_as_date(pre.get("actual_ex_factory")), key=f"actual_ex_factory{sfx}")
 
         with colC:
-            subcontract_washing = st.selectbox("Subcontract washing", ["NO", "YES"], index=0)
+            subcontract_washing = st.selectbox("Subcontract washing", ["NO", "YES"], index=_pick(["NO", "YES"], pre.get("subcontract_washing")))
             st.markdown("**Top 3 Wash Issues**")
-            issue_1 = st.selectbox("Issue 1", [""] + issues)
-            issue_2 = st.selectbox("Issue 2", [""] + issues, key="i2")
-            issue_3 = st.selectbox("Issue 3", [""] + issues, key="i3")
+            issue_1 = st.selectbox("Issue 1", [""] + issues, index=_pick([""] + issues, pre.get("issue_1")))
+            issue_2 = st.selectbox("Issue 2", [""] + issues, index=_pick([""] + issues, pre.get("issue_2")), key=f"i2{sfx}")
+            issue_3 = st.selectbox("Issue 3", [""] + issues, index=_pick([""] + issues, pre.get("issue_3")), key=f"i3{sfx}")
 
-            other_issue = st.checkbox("Other Issue?")
+            other_issue = st.checkbox("Other Issue?", value=bool(pre.get("other_issue_text")))
             other_issue_text = ""
             if other_issue:
-                other_issue_text = st.text_input("Specify other issue (max 20 chars)", max_chars=20)
+                other_issue_text = st.text_input("Specify other issue (max 20 chars)", max_chars=20, value=pre.get("other_issue_text") or "")
 
-            remarks = st.text_area("Remarks (Wash Tech Comment)", height=120)
+            remarks = st.text_area("Remarks (Wash Tech Comment)", height=120, value=pre.get("remarks") or "")
             image_file = st.file_uploader("Upload Style Image (jpg/png)", type=["jpg", "jpeg", "png"])
 
         submitted = st.form_submit_button("Save Entry")
 
     if submitted:
+        if db.entry_archived(style_no.strip(), contract_no.strip(), laundry_name):
+            st.error("❌ This Style/Contract/Laundry is archived (closed period) and can't be saved again.")
+            return
+
         image_path = ""
         if image_file is not None:
             ts = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -251,73 +297,63 @@ def data_entry():
             "image_path": image_path,
         }
 
-        db.save_entry(entry)
-        st.success("✅ Saved successfully!")
+        existing = db.find_entry(entry["style_no"], entry["contract_no"], laundry_name)
+        db.save_entry(entry, upsert=True)
+        st.session_state.pop("entry_prefill", None)
+        if existing:
+            st.success(f"✅ Updated existing entry (saved {existing['created_at']}).")
+        else:
+            st.success("✅ Saved successfully!")
 
 
-# ----------------- EXPORT (ZIP: CSV + IMAGES) -----------------
+# ----------------- EXPORT (ZIP: CSV + IMAGES / PARQUET) -----------------
 def export_view():
-    st.header("Export (ZIP: CSV + Images)")
+    st.header("Export (ZIP: CSV + Images / Parquet)")
 
     col1, col2, col3 = st.columns([1, 1, 1.2])
     with col1:
-        preset = st.selectbox("Quick Range", ["Custom", "Last 1 Month", "Last 6 Months", "Last 1 Year"])
+        preset = st.selectbox("Quick Range", reports.RANGE_PRESETS)
     with col2:
         d_from = st.date_input("From", value=date.today() - relativedelta(months=1))
     with col3:
         d_to = st.date_input("To", value=date.today())
 
-    if preset != "Custom":
-        if preset == "Last 1 Month":
-            d_from = date.today() - relativedelta(months=1)
-        elif preset == "Last 6 Months":
-            d_from = date.today() - relativedelta(months=6)
-        elif preset == "Last 1 Year":
-            d_from = date.today() - relativedelta(years=1)
-        d_to = date.today()
+    d_from, d_to = reports.resolve_range(preset, d_from, d_to)
+
+    fmt = st.radio("Format", ["ZIP (CSV + Images)", "Parquet (typed, compressed)"], horizontal=True)
+
+    if fmt.startswith("Parquet"):
+        # streamed from the database in row groups; preview comes from the file itself
+        data, n = reports.build_export_parquet(d_from, d_to)
 
-    data = db.read_entries(str(d_from), str(d_to))
-    df = pd.DataFrame(data)
+        st.write(f"Rows: **{n}**")
+        if n == 0:
+            st.info("No data in this range.")
+            return
+
+        st.dataframe(reports.parquet_preview(data), use_container_width=True, height=350)
+        st.download_button(
+            "⬇️ Download Parquet",
+            data=data,
+            file_name=f"laundry_export_{d_from}_to_{d_to}.parquet",
+            mime="application/vnd.apache.parquet"
+        )
+        return
+
+    df = reports.load_entries(d_from, d_to)
 
     st.write(f"Rows: **{len(df)}**")
     if len(df) == 0:
         st.info("No data in this range.")
         return
 
-    if "image_path" not in df.columns:
-        df["image_path"] = ""
-
-    def rel_img(p):
-        if not p:
-            return ""
-        return "images/" + Path(p).name
-
-    df["image_rel_path"] = df["image_path"].apply(rel_img)
+    df = reports.add_image_rel_path(df)
 
     st.dataframe(df, use_container_width=True, height=350)
 
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-        # CSV
-        zf.writestr("entries.csv", df.to_csv(index=False).encode("utf-8"))
-
-        # Images folder
-        for p in df["image_path"].dropna().unique():
-            if p and os.path.exists(p):
-                zf.write(p, arcname=f"images/{Path(p).name}")
-
-        zf.writestr(
-            "README.txt",
-            "Unzip this file.\n"
-            "entries.csv contains image_rel_path column.\n"
-            "Images are stored inside images/ folder.\n"
-        )
-
-    zip_buffer.seek(0)
-
     st.download_button(
         "⬇️ Download ZIP (CSV + Images)",
-        data=zip_buffer.getvalue(),
+        data=reports.build_export_zip(df),
         file_name=f"laundry_export_{d_from}_to_{d_to}.zip",
         mime="application/zip"
     )
@@ -340,91 +376,46 @@ def dashboard_view():
     with c4:
         d_to = st.date_input("To", value=date.today(), key="dash_to")
 
-    data = db.read_entries(str(d_from), str(d_to))
-    if not data:
-        st.info("No data in this range.")
-        return
-
-    df = pd.DataFrame(data)
-
-    # Filters
-    if factory_filter != "All":
-        df = df[df.get("factory_name", "") == factory_filter]
-    if laundry_filter != "All":
-        df = df[df.get("laundry_name", "") == laundry_filter]
-
+    df = reports.load_entries(d_from, d_to, factory_filter, laundry_filter)
     if df.empty:
-        st.warning("No data after applying filters.")
+        st.info("No data for this range and filters.")
         return
 
-    # Numeric conversions
-    df["factory_order"] = pd.to_numeric(df.get("factory_order_qty", 0), errors="coerce").fillna(0)
-    df["uk_order"] = pd.to_numeric(df.get("customer_order_qty", 0), errors="coerce").fillna(0)
-    df["ship_qty"] = pd.to_numeric(df.get("total_shipment_qty", 0), errors="coerce").fillna(0)
-
-    total_factory_order = df["factory_order"].sum()
-    total_uk_order = df["uk_order"].sum()
-    total_ship = df["ship_qty"].sum()
-
-    factory_ship_pct = (total_ship / total_factory_order * 100) if total_factory_order else 0
-    uk_ship_pct = (total_ship / total_uk_order * 100) if total_uk_order else 0
+    df = kpis.add_numeric_columns(df)
+    kpi = kpis.kpi_totals(df)
 
     k1, k2, k3 = st.columns(3)
-    k1.metric("Factory Order vs Shipment %", f"{factory_ship_pct:.1f}%")
-    k2.metric("UK(Customer) Order vs Shipment %", f"{uk_ship_pct:.1f}%")
-    k3.metric("Total Shipment Qty", f"{int(total_ship)}")
+    k1.metric("Factory Order vs Shipment %", f"{kpi['factory_ship_pct']:.1f}%")
+    k2.metric("UK(Customer) Order vs Shipment %", f"{kpi['uk_ship_pct']:.1f}%")
+    k3.metric("Total Shipment Qty", f"{int(kpi['total_shipment'])}")
 
     st.divider()
 
-    # All laundry performance (single dashboard)
-    st.subheader("All Laundries Performance (Order vs Shipment %)")
+    # Performance per laundry / factory / ... (single dashboard)
+    group_labels = {
+        "laundry_name": "Laundry", "factory_name": "Factory", "department_name": "Department",
+        "wash_category": "Wash Category", "customer_name": "Customer",
+    }
+    group_by = st.selectbox("Group by", kpis.GROUP_KEYS, format_func=group_labels.get, key="dash_group_by")
+    group_label = group_labels[group_by]
 
-    perf = df.groupby("laundry_name", as_index=False).agg(
-        factory_order=("factory_order", "sum"),
-        uk_order=("uk_order", "sum"),
-        shipment=("ship_qty", "sum"),
-    )
+    st.subheader(f"Performance by {group_label} (Order vs Shipment %)")
 
-    perf["shipment_vs_factory_%"] = perf.apply(
-        lambda r: (r["shipment"] / r["factory_order"] * 100) if r["factory_order"] else 0, axis=1
-    )
-    perf["shipment_vs_uk_%"] = perf.apply(
-        lambda r: (r["shipment"] / r["uk_order"] * 100) if r["uk_order"] else 0, axis=1
-    )
-    perf = perf.sort_values("shipment_vs_factory_%", ascending=False)
+    perf = kpis.performance(df, group_by)
 
     st.dataframe(perf, use_container_width=True)
-    st.bar_chart(perf.set_index("laundry_name")[["shipment_vs_factory_%"]])
+    st.bar_chart(perf.set_index(group_by)[["shipment_vs_factory_%"]])
 
     st.divider()
 
-    # Top 3 issues (defects) per laundry
-    st.subheader("Top 3 Wash Issues (Defects) by Laundry")
-
-    for col in ["issue_1", "issue_2", "issue_3", "other_issue_text"]:
-        if col not in df.columns:
-            df[col] = ""
-
-    long_rows = []
-    for _, r in df.iterrows():
-        lname = (r.get("laundry_name") or "").strip()
-        for col in ["issue_1", "issue_2", "issue_3"]:
-            v = (r.get(col) or "").strip()
-            if v:
-                long_rows.append((lname, v))
-        other = (r.get("other_issue_text") or "").strip()
-        if other:
-            long_rows.append((lname, other))
-
-    if not long_rows:
+    # Top 3 issues (defects) per group
+    st.subheader(f"Top 3 Wash Issues (Defects) by {group_label}")
+
+    top3 = kpis.top_issues(df, by=group_by)
+    if top3.empty:
         st.info("No issues found in selected range/filters.")
         return
 
-    long_df = pd.DataFrame(long_rows, columns=["laundry_name", "issue"])
-    top = long_df.groupby(["laundry_name", "issue"]).size().reset_index(name="count")
-    top = top.sort_values(["laundry_name", "count"], ascending=[True, False])
-    top3 = top.groupby("laundry_name").head(3)
-
     st.dataframe(top3, use_container_width=True)
 
 
@@ -0,0 +1,43 @@
+"""
+Move closed periods of `entries` to cold storage (see db.archive_entries):
+
+    python archive.py                      # keep the last 6 months hot
+    python archive.py --keep-months 12
+    python archive.py --before 2024-01-01
+    python archive.py --partition          # Postgres: convert an old unpartitioned entries table
+"""
+import argparse
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+
+import db
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Archive old Laundry KPI entries to cold storage.")
+    ap.add_argument("--before", type=date.fromisoformat,
+                    help="archive whole months before this date's month")
+    ap.add_argument("--keep-months", type=int, default=6,
+                    help="months to keep hot when --before is not given (default: 6)")
+    ap.add_argument("--partition", action="store_true",
+                    help="Postgres only: convert an unpartitioned entries table to monthly partitions, then exit")
+    args = ap.parse_args(argv)
+
+    if args.partition:
+        copied = db.partition_entries()
+        if copied is None:
+            print("entries is already partitioned.")
+        else:
+            print(f"Partitioned entries: {copied} rows copied (old table kept as entries_unpartitioned).")
+        return
+
+    before = args.before or (date.today().replace(day=1) - relativedelta(months=args.keep_months))
+
+    db.init_db()
+    moved = db.archive_entries(before)
+    unit = "partitions" if db._is_postgres() else "rows"
+    print(f"Archived {moved} {unit} created before {before.replace(day=1)}.")
+
+if __name__ == "__main__":
+    main()
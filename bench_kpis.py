@@ -0,0 +1,122 @@
+"""
+Benchmark of the Dashboard KPI code: the old row-wise versions
+(DataFrame.apply / iterrows) against the vectorized ones in kpis.py.
+
+    python bench_kpis.py                      # 100k and 1M rows
+    python bench_kpis.py --rows 10000,100000 --repeat 5
+
+Checks that both give the same results first, then prints the best of
+--repeat timings per function and size.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import kpis
+
+
+# ----------------- OLD (ROW-WISE) VERSIONS -----------------
+def old_laundry_performance(df):
+    perf = df.groupby("laundry_name", as_index=False).agg(
+        factory_order=("factory_order", "sum"),
+        uk_order=("uk_order", "sum"),
+        shipment=("ship_qty", "sum"),
+    )
+
+    perf["shipment_vs_factory_%"] = perf.apply(
+        lambda r: (r["shipment"] / r["factory_order"] * 100) if r["factory_order"] else 0, axis=1
+    )
+    perf["shipment_vs_uk_%"] = perf.apply(
+        lambda r: (r["shipment"] / r["uk_order"] * 100) if r["uk_order"] else 0, axis=1
+    )
+    return perf.sort_values("shipment_vs_factory_%", ascending=False)
+
+def old_top_issues(df, n=3):
+    for col in ["issue_1", "issue_2", "issue_3", "other_issue_text"]:
+        if col not in df.columns:
+            df[col] = ""
+
+    long_rows = []
+    for _, r in df.iterrows():
+        lname = (r.get("laundry_name") or "").strip()
+        for col in ["issue_1", "issue_2", "issue_3"]:
+            v = (r.get(col) or "").strip()
+            if v:
+                long_rows.append((lname, v))
+        other = (r.get("other_issue_text") or "").strip()
+        if other:
+            long_rows.append((lname, other))
+
+    if not long_rows:
+        return pd.DataFrame(columns=["laundry_name", "issue", "count"])
+
+    long_df = pd.DataFrame(long_rows, columns=["laundry_name", "issue"])
+    top = long_df.groupby(["laundry_name", "issue"]).size().reset_index(name="count")
+    top = top.sort_values(["laundry_name", "count"], ascending=[True, False])
+    return top.groupby("laundry_name").head(n)
+
+
+# ----------------- DATA -----------------
+def make_entries(n, seed=0):
+    """n synthetic entries (40 laundries, a few issues, ~5% missing order qty)."""
+    rng = np.random.default_rng(seed)
+    issues = np.array(["", "Shade", "Hole", "Patchy", "Stain"], dtype=object)
+    df = pd.DataFrame({
+        "laundry_name": rng.choice([f"L{i}" for i in range(40)], n),
+        "factory_order_qty": np.where(rng.random(n) < 0.05, None, rng.integers(0, 5000, n)).astype(object),
+        "customer_order_qty": rng.integers(0, 5000, n),
+        "total_shipment_qty": rng.integers(0, 5000, n),
+        "issue_1": rng.choice(issues, n),
+        "issue_2": rng.choice(issues, n),
+        "issue_3": rng.choice(issues, n),
+        "other_issue_text": rng.choice(np.array(["", " Odour "], dtype=object), n),
+    })
+    df.loc[df["laundry_name"] == "L3", "factory_order_qty"] = 0  # a zero-order group
+    return kpis.add_numeric_columns(df)
+
+
+# ----------------- RUNNER -----------------
+def _best(fn, df, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        d = df.copy()
+        t0 = time.perf_counter()
+        fn(d)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+def check_same(df):
+    pd.testing.assert_frame_equal(
+        old_laundry_performance(df.copy()).reset_index(drop=True),
+        kpis.laundry_performance(df.copy()).reset_index(drop=True),
+    )
+    pd.testing.assert_frame_equal(
+        old_top_issues(df.copy()).reset_index(drop=True),
+        kpis.top_issues(df.copy()).reset_index(drop=True),
+        check_dtype=False,
+    )
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Compare row-wise and vectorized KPI computations.")
+    ap.add_argument("--rows", default="100000,1000000", help="comma-separated entry counts")
+    ap.add_argument("--repeat", type=int, default=3, help="timings per case; the best is reported")
+    args = ap.parse_args(argv)
+
+    check_same(make_entries(5_000))
+    print("old and new results match")
+
+    cases = [
+        ("laundry_performance", old_laundry_performance, kpis.laundry_performance),
+        ("top_issues", old_top_issues, kpis.top_issues),
+    ]
+    for n in [int(x) for x in args.rows.split(",")]:
+        df = make_entries(n)
+        for name, old, new in cases:
+            t_old = _best(old, df, args.repeat)
+            t_new = _best(new, df, args.repeat)
+            print(f"rows={n:<9} {name:<20} old={t_old:>10.1f}ms new={t_new:>8.1f}ms  x{t_old / t_new:.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,32 @@
+import contextlib
+import functools
 import os
+import queue
 import sqlite3
+import threading
+from datetime import date, timedelta
 from pathlib import Path
 from urllib.parse import urlparse
 
 import psycopg2
+import psycopg2.errors
 import psycopg2.extras
 
 DB_PATH = Path("data") / "app.db"
 
+# Cold storage for archived entries:
+#   Postgres: detached monthly partitions live in this schema.
+#   SQLite:   one attached database per year in DB_PATH.parent / "archive".
+ARCHIVE_SCHEMA = "entries_archive"
+# SQLite allows 10 attached databases per connection; archive years are read in groups of this many
+_SQLITE_MAX_ATTACH = 9
+
+# A wash tech's entry is identified by style + contract + laundry; resubmitting
+# it updates the existing row (save_entry(upsert=True)). Rows with a blank
+# style or contract are never treated as duplicates.
+ENTRY_KEY = ("style_no", "contract_no", "laundry_name")
+_ENTRY_KEY_PRED = "style_no <> '' AND contract_no <> '' AND laundry_name <> ''"
+
 def _is_postgres():
     return bool(os.getenv("DATABASE_URL"))
 
@@ -19,7 +38,8 @@ def get_conn():
     if _is_postgres():
         db_url = os.getenv("DATABASE_URL")
         # Render often provides postgres://, psycopg2 expects it fine.
-        conn = psycopg2.connect(db_url, sslmode="require")
+        # PGSSLMODE=disable for a local Postgres without SSL.
+        conn = psycopg2.connect(db_url, sslmode=os.getenv("PGSSLMODE", "require"))
         return conn
     else:
         DB_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -41,6 +61,222 @@ def _column_exists_pg(conn, table, col):
         """, (table, col))
         return cur.fetchone() is not None
 
+# ---------- time partitioning (hot/cold) ----------
+
+def _next_month(d):
+    return (d.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+def _range_bounds(date_from=None, date_to=None):
+    """
+    [lower, upper) bounds on created_at ("YYYY-MM-DD HH:MM:SS" text) for an
+    inclusive date range. Plain comparisons keep the created_at index and
+    partition pruning usable, unlike date(created_at).
+    """
+    lower = str(date_from)[:10] if date_from else None
+    upper = None
+    if date_to:
+        upper = str(date.fromisoformat(str(date_to)[:10]) + timedelta(days=1))
+    return lower, upper
+
+def _overlaps(start, end, lower, upper):
+    return (upper is None or start < upper) and (lower is None or end > lower)
+
+def _pg_is_partitioned(cur):
+    cur.execute("""
+        SELECT 1 FROM pg_partitioned_table
+        WHERE partrelid = 'entries'::regclass;
+    """)
+    return cur.fetchone() is not None
+
+def _pg_partition_name(month):
+    return f"entries_p{month:%Y%m}"
+
+def _pg_create_month_partition(cur, month):
+    """
+    Create the partition for `month`. Rows for that month already sitting in
+    the default partition are moved into it first (ATTACH fails otherwise).
+    """
+    name = _pg_partition_name(month)
+    cur.execute("SELECT to_regclass(%s) IS NOT NULL;", (name,))
+    if cur.fetchone()[0]:
+        return
+    bounds = (str(month), str(_next_month(month)))
+    cur.execute(f"CREATE TABLE {name} (LIKE entries INCLUDING DEFAULTS);")
+    cur.execute(f"""
+        WITH moved AS (
+            DELETE FROM entries_default WHERE created_at >= %s AND created_at < %s RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved;
+    """, bounds)
+    cur.execute(f"ALTER TABLE entries ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s);", bounds)
+
+def _pg_ensure_partitions(cur):
+    """
+    Default partition, a partition for every month found in it (backdated or
+    backfilled rows), and this + next month so new entries skip the default.
+    """
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext('entries_partitions'));")
+    cur.execute("CREATE TABLE IF NOT EXISTS entries_default PARTITION OF entries DEFAULT;")
+    cur.execute("""
+        SELECT DISTINCT substr(created_at, 1, 7) FROM entries_default
+        WHERE created_at ~ '^[0-9]{4}-(0[1-9]|1[0-2])';
+    """)
+    months = {date(int(ym[:4]), int(ym[5:7]), 1) for (ym,) in cur.fetchall()}
+    this_month = date.today().replace(day=1)
+    months.update((this_month, _next_month(this_month)))
+    for m in sorted(months):
+        _pg_create_month_partition(cur, m)
+
+def _pg_month_tables(cur, schema):
+    """[(table_name, month_start)] of entries_pYYYYMM tables in schema."""
+    cur.execute("""
+        SELECT table_name FROM information_schema.tables
+        WHERE table_schema=%s AND table_name ~ '^entries_p[0-9]{6}$';
+    """, (schema,))
+    out = []
+    for (name,) in cur.fetchall():
+        out.append((name, date(int(name[9:13]), int(name[13:15]), 1)))
+    return sorted(out, key=lambda t: t[1])
+
+def _pg_cold_sources(conn, lower, upper):
+    with conn.cursor() as cur:
+        return [
+            f"{ARCHIVE_SCHEMA}.{name}"
+            for name, month in _pg_month_tables(cur, ARCHIVE_SCHEMA)
+            if _overlaps(str(month), str(_next_month(month)), lower, upper)
+        ]
+
+def _sqlite_archive_path(year):
+    return DB_PATH.parent / "archive" / f"entries_{year}.db"
+
+def _sqlite_archive_years():
+    folder = DB_PATH.parent / "archive"
+    if not folder.exists():
+        return []
+    return sorted(int(p.stem[8:]) for p in folder.glob("entries_[0-9][0-9][0-9][0-9].db"))
+
+def _sqlite_year_groups(lower, upper):
+    """
+    [(years, lo, hi)], newest first: the archive years overlapping [lower,
+    upper) in groups of at most _SQLITE_MAX_ATTACH, each with the created_at
+    span it covers. The spans are contiguous and together cover the range.
+    """
+    years = sorted(
+        (y for y in _sqlite_archive_years() if _overlaps(f"{y}-01-01", f"{y + 1}-01-01", lower, upper)),
+        reverse=True,
+    )
+    groups = [years[i:i + _SQLITE_MAX_ATTACH] for i in range(0, len(years), _SQLITE_MAX_ATTACH)] or [[]]
+    out = []
+    hi = upper
+    for i, group in enumerate(groups):
+        lo = lower if i == len(groups) - 1 else f"{group[-1]}-01-01"
+        out.append((group, lo, hi))
+        hi = lo
+    return out
+
+def _sqlite_attach_cold(conn, years):
+    """Attach the given per-year archives; returns their table names."""
+    sources = []
+    try:
+        for year in years:
+            conn.execute(f"ATTACH DATABASE ? AS arch_{year};", (_sqlite_archive_path(year).as_posix(),))
+            sources.append(f"arch_{year}.entries")
+    except Exception:
+        # don't leave a half-attached set on a reused connection
+        _detach_cold(conn, sources)
+        raise
+    return sources
+
+def _sqlite_entry_columns(conn, schema="main"):
+    return [r["name"] for r in conn.execute(f"PRAGMA {schema}.table_info(entries);").fetchall()]
+
+def _entry_key_index_stale(indexdef):
+    """A unique entry-key index from before laundry_name was part of its predicate."""
+    if not indexdef or "UNIQUE" not in indexdef.upper():
+        return False
+    return "laundry_name <>" not in indexdef.partition("WHERE")[2]
+
+def _create_entry_key_index(conn, is_pg):
+    """
+    Unique when possible, so upserts can use ON CONFLICT. Falls back to a
+    plain index if the table already holds duplicates, and always on
+    partitioned Postgres (unique indexes there must include created_at).
+    """
+    cols = ",".join(ENTRY_KEY)
+    unique_sql = f"CREATE UNIQUE INDEX IF NOT EXISTS idx_entries_entry_key ON entries({cols}) WHERE {_ENTRY_KEY_PRED};"
+    plain_sql = f"CREATE INDEX IF NOT EXISTS idx_entries_entry_key ON entries({cols});"
+
+    if is_pg:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_get_indexdef(to_regclass('idx_entries_entry_key'));")
+            if _entry_key_index_stale(cur.fetchone()[0]):
+                cur.execute("DROP INDEX idx_entries_entry_key;")
+            if _pg_is_partitioned(cur):
+                cur.execute(plain_sql)
+            else:
+                try:
+                    cur.execute(unique_sql)
+                except psycopg2.errors.UniqueViolation:
+                    conn.rollback()
+                    cur.execute(plain_sql)
+        conn.commit()
+    else:
+        row = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type='index' AND name='idx_entries_entry_key';"
+        ).fetchone()
+        if row and _entry_key_index_stale(row["sql"]):
+            conn.execute("DROP INDEX idx_entries_entry_key;")
+        try:
+            conn.execute(unique_sql)
+        except sqlite3.IntegrityError:
+            conn.execute(plain_sql)
+        conn.commit()
+
+def _archived_keys_sql(source, where=""):
+    """Record the complete entry keys found in `source` (rows being archived)."""
+    cols = ",".join(ENTRY_KEY)
+    return (
+        f"INSERT INTO archived_entry_keys({cols}) SELECT DISTINCT {cols} FROM {source} "
+        f"WHERE {_ENTRY_KEY_PRED}{where} ON CONFLICT DO NOTHING;"
+    )
+
+def _create_archived_keys_table(conn, is_pg):
+    """
+    Keys of entries moved to cold storage. Archived entries are frozen
+    (save_entry refuses their keys), so a closed period can't gain a second,
+    hot copy of an entry. Filled from any existing archives when created.
+    """
+    ddl = """
+        CREATE TABLE archived_entry_keys(
+            style_no TEXT NOT NULL,
+            contract_no TEXT NOT NULL,
+            laundry_name TEXT NOT NULL,
+            PRIMARY KEY (style_no, contract_no, laundry_name)
+        );
+    """
+    if is_pg:
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass('archived_entry_keys') IS NOT NULL;")
+            if cur.fetchone()[0]:
+                return
+            cur.execute(ddl)
+            for name, _ in _pg_month_tables(cur, ARCHIVE_SCHEMA):
+                cur.execute(_archived_keys_sql(f"{ARCHIVE_SCHEMA}.{name}"))
+        conn.commit()
+        return
+
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='archived_entry_keys';").fetchone():
+        return
+    conn.execute(ddl)
+    conn.commit()
+    for year in _sqlite_archive_years():
+        sources = _sqlite_attach_cold(conn, [year])
+        try:
+            conn.execute(_archived_keys_sql(sources[0]))
+            conn.commit()
+        finally:
+            _detach_cold(conn, sources)
+
 def init_db():
     conn = get_conn()
     is_pg = _is_postgres()
@@ -68,7 +304,7 @@ def init_db():
 
             cur.execute("""
             CREATE TABLE IF NOT EXISTS entries(
-                id SERIAL PRIMARY KEY,
+                id SERIAL,
                 created_at TEXT NOT NULL,
                 created_by TEXT NOT NULL,
 
@@ -110,11 +346,20 @@ def init_db():
 
                 remarks TEXT,
 
-                image_path TEXT
-            );
+                image_path TEXT,
+
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at);
             """)
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_entries_created_at ON entries(created_at);")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_entries_factory_created ON entries(factory_name, created_at);")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_entries_laundry_created ON entries(laundry_name, created_at);")
+            if _pg_is_partitioned(cur):
+                _pg_ensure_partitions(cur)
 
         conn.commit()
+        _create_entry_key_index(conn, is_pg)
+        _create_archived_keys_table(conn, is_pg)
 
         # seed admin if empty
         with conn.cursor() as cur:
@@ -198,7 +443,12 @@ def init_db():
         image_path TEXT
     );
     """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_entries_created_at ON entries(created_at);")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_entries_factory_created ON entries(factory_name, created_at);")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_entries_laundry_created ON entries(laundry_name, created_at);")
     conn.commit()
+    _create_entry_key_index(conn, is_pg)
+    _create_archived_keys_table(conn, is_pg)
 
     # seed admin
     cur.execute("SELECT COUNT(*) as c FROM users;")
@@ -211,50 +461,250 @@ def init_db():
 
     conn.close()
 
+# ---------- query layer ----------
+#
+# Statements are written once with "?" placeholders and compiled per dialect
+# (cached). Hot paths reuse pooled connections (one pool per process and
+# database): SQLite keeps its statement cache on them, and on Postgres a
+# statement run again on a connection is PREPAREd there once and then run
+# with EXECUTE. Every read returns plain dicts.
+
+_SQL = {
+    # key: (sqlite, postgres) -- None means same text for both
+    "fetch_all": ("SELECT * FROM {table} ORDER BY name;", None),
+    "add_master": (
+        "INSERT OR IGNORE INTO {table}(name) VALUES(?);",
+        "INSERT INTO {table}(name) VALUES(?) ON CONFLICT (name) DO NOTHING;",
+    ),
+    "delete_master": ("DELETE FROM {table} WHERE name=?;", None),
+    "validate_user": ("SELECT username, role, full_name FROM users WHERE username=? AND password=?;", None),
+    "create_user": ("INSERT INTO users(username, password, role, full_name) VALUES(?,?,?,?);", None),
+    "find_entry": (
+        "SELECT * FROM entries WHERE style_no=? AND contract_no=? AND laundry_name=? "
+        "ORDER BY created_at DESC LIMIT 1;",
+        None,
+    ),
+    "entry_key_unique": (
+        "SELECT 1 AS u FROM pragma_index_list('entries') WHERE name='idx_entries_entry_key' AND \"unique\"=1;",
+        "SELECT 1 AS u FROM pg_index WHERE indexrelid = to_regclass('idx_entries_entry_key') AND indisunique;",
+    ),
+    "entry_key_lock": (None, "SELECT pg_advisory_xact_lock(hashtext(?));"),
+    "entry_archived": (
+        "SELECT 1 AS a FROM archived_entry_keys WHERE style_no=? AND contract_no=? AND laundry_name=?;",
+        None,
+    ),
+}
+
+@functools.lru_cache(maxsize=None)
+def _compile(sql, is_pg):
+    return sql.replace("?", "%s") if is_pg else sql
+
+@functools.lru_cache(maxsize=None)
+def _stmt(key, is_pg, **fmt):
+    sqlite_sql, pg_sql = _SQL[key]
+    sql = (pg_sql if is_pg and pg_sql else sqlite_sql).format(**fmt)
+    return _compile(sql, is_pg)
+
+@functools.lru_cache(maxsize=None)
+def _insert_sql(table, cols, is_pg):
+    return _compile(f"INSERT INTO {table}({','.join(cols)}) VALUES({','.join(['?'] * len(cols))});", is_pg)
+
+def _entry_update_sets(table, cols, source):
+    """SET list for an entry update; the key and creation stamp never change
+    and an empty image_path keeps the stored image."""
+    sets = []
+    for c in cols:
+        if c in ENTRY_KEY or c in ("created_at", "created_by"):
+            continue
+        value = source.format(c=c)
+        if c == "image_path":
+            value = f"COALESCE(NULLIF({value},''), {table}.image_path)"
+        sets.append(f"{c}={value}")
+    return sets
+
+@functools.lru_cache(maxsize=None)
+def _upsert_sql(table, cols, is_pg):
+    sets = _entry_update_sets(table, cols, "excluded.{c}")
+    action = f"DO UPDATE SET {','.join(sets)}" if sets else "DO NOTHING"
+    insert = _insert_sql(table, cols, False).rstrip(";")
+    return _compile(f"{insert} ON CONFLICT ({','.join(ENTRY_KEY)}) WHERE {_ENTRY_KEY_PRED} {action};", is_pg)
+
+@functools.lru_cache(maxsize=None)
+def _update_latest_sql(table, cols, is_pg):
+    """UPDATE the newest row with the given key; params are the SET values then the key."""
+    sets = _entry_update_sets(table, cols, "?") or ["id=id"]
+    match = " AND ".join(f"{k}=?" for k in ENTRY_KEY)
+    return _compile(
+        f"UPDATE {table} SET {','.join(sets)} WHERE id = "
+        f"(SELECT id FROM {table} WHERE {match} ORDER BY created_at DESC LIMIT 1);",
+        is_pg,
+    )
+
+@functools.lru_cache(maxsize=None)
+def _pg_prepare(sql):
+    """%s-style statement -> (PREPARE body with $n params, EXECUTE args template)."""
+    parts = sql.rstrip().rstrip(";").split("%s")
+    body = parts[0] + "".join(f"${i}{p}" for i, p in enumerate(parts[1:], start=1))
+    n = len(parts) - 1
+    args = f" ({','.join(['%s'] * n)})" if n else ""
+    return body, args
+
+class _PooledConn:
+    """One pooled connection plus the statements already PREPAREd on it."""
+
+    def __init__(self, is_pg):
+        self.is_pg = is_pg
+        self.seen = set()
+        self.prepared = {}
+        self.conn = get_conn()
+        if is_pg:
+            # single-statement writes; don't leave reads idle in a transaction
+            self.conn.autocommit = True
+
+    @property
+    def closed(self):
+        return bool(self.conn.closed) if self.is_pg else False
+
+    def run(self, sql, params):
+        if not self.is_pg:
+            return self.conn.execute(sql, params)
+        cur = self.conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        name = self.prepared.get(sql)
+        if name is None:
+            if sql not in self.seen:
+                # only statements that come back on this connection are worth a PREPARE
+                self.seen.add(sql)
+                cur.execute(sql, params)
+                return cur
+            name = f"lk_{len(self.prepared)}"
+            cur.execute(f"PREPARE {name} AS {_pg_prepare(sql)[0]};")
+            self.prepared[sql] = name
+        cur.execute(f"EXECUTE {name}{_pg_prepare(sql)[1]};", params)
+        return cur
+
+class _Backend:
+    """
+    Process-wide pool of connections to one database. Streamlit runs every
+    rerun on a new thread, so connections (and their prepared statements)
+    are kept here rather than per thread. DB_POOL_SIZE caps how many are open.
+    """
+
+    def __init__(self, is_pg, target):
+        self.is_pg = is_pg
+        self.target = target
+        self.entry_columns = None
+        self.unique_entry_key = None
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(int(os.getenv("DB_POOL_SIZE", "10")))
+        self._held = threading.local()
+
+    @contextlib.contextmanager
+    def connection(self):
+        """A pooled connection for this thread; nested calls get the same one."""
+        pc = getattr(self._held, "conn", None)
+        if pc is not None:
+            yield pc
+            return
+
+        self._slots.acquire()
+        try:
+            try:
+                pc = self._idle.get_nowait()
+            except queue.Empty:
+                pc = None
+            if pc is None or pc.closed:
+                pc = _PooledConn(self.is_pg)
+            self._held.conn = pc
+            try:
+                yield pc
+            finally:
+                self._held.conn = None
+                if not pc.closed:
+                    self._idle.put(pc)
+        finally:
+            self._slots.release()
+
+    def execute(self, sql, params=()):
+        with self.connection() as pc:
+            try:
+                cur = pc.run(sql, params)
+                if not self.is_pg:
+                    pc.conn.commit()
+                return cur.rowcount
+            except Exception:
+                if not self.is_pg:
+                    pc.conn.rollback()
+                raise
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Yields a connection whose run() calls form one transaction (SQLite takes the write lock up front)."""
+        with self.connection() as pc:
+            if self.is_pg:
+                pc.conn.cursor().execute("BEGIN;")
+            else:
+                pc.conn.execute("BEGIN IMMEDIATE;")
+            try:
+                yield pc
+            except Exception:
+                if self.is_pg:
+                    pc.conn.cursor().execute("ROLLBACK;")
+                else:
+                    pc.conn.rollback()
+                raise
+            if self.is_pg:
+                pc.conn.cursor().execute("COMMIT;")
+            else:
+                pc.conn.commit()
+
+    def fetchall(self, sql, params=()):
+        with self.connection() as pc:
+            return [dict(r) for r in pc.run(sql, params).fetchall()]
+
+    def fetchone(self, sql, params=()):
+        with self.connection() as pc:
+            row = pc.run(sql, params).fetchone()
+            return dict(row) if row else None
+
+_backends = {}
+_backends_lock = threading.Lock()
+# Pools inherited from a parent process. Their sockets belong to the parent,
+# so they are kept referenced (never closed or garbage-collected) in the child.
+_inherited = []
+
+def _after_fork_in_child():
+    global _backends_lock
+    _backends_lock = threading.Lock()
+    _inherited.extend(_backends.values())
+    _backends.clear()
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+def _backend():
+    is_pg = _is_postgres()
+    target = os.getenv("DATABASE_URL") if is_pg else DB_PATH.as_posix()
+    b = _backends.get(target)
+    if b is None:
+        with _backends_lock:
+            b = _backends.setdefault(target, _Backend(is_pg, target))
+    return b
+
 # ---------- CRUD helpers (work for both) ----------
 
 def fetch_all(table_name):
-    conn = get_conn()
-    is_pg = _is_postgres()
-    if is_pg:
-        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-            cur.execute(f"SELECT * FROM {table_name} ORDER BY name;")
-            rows = cur.fetchall()
-        conn.close()
-        return rows
-    else:
-        rows = conn.execute(f"SELECT * FROM {table_name} ORDER BY name;").fetchall()
-        conn.close()
-        return rows
+    b = _backend()
+    return b.fetchall(_stmt("fetch_all", b.is_pg, table=table_name))
 
 def add_master(table_name, name):
     name = name.strip()
     if not name:
         return
-    conn = get_conn()
-    is_pg = _is_postgres()
-    if is_pg:
-        with conn.cursor() as cur:
-            cur.execute(f"INSERT INTO {table_name}(name) VALUES(%s) ON CONFLICT (name) DO NOTHING;", (name,))
-        conn.commit()
-        conn.close()
-    else:
-        conn.execute(f"INSERT OR IGNORE INTO {table_name}(name) VALUES(?);", (name,))
-        conn.commit()
-        conn.close()
+    b = _backend()
+    b.execute(_stmt("add_master", b.is_pg, table=table_name), (name,))
 
 def delete_master(table_name, name):
-    conn = get_conn()
-    is_pg = _is_postgres()
-    if is_pg:
-        with conn.cursor() as cur:
-            cur.execute(f"DELETE FROM {table_name} WHERE name=%s;", (name,))
-        conn.commit()
-        conn.close()
-    else:
-        conn.execute(f"DELETE FROM {table_name} WHERE name=?;", (name,))
-        conn.commit()
-        conn.close()
+    b = _backend()
+    b.execute(_stmt("delete_master", b.is_pg, table=table_name), (name,))
 
 def add_wash_category(name):
     add_master("wash_categories", name)
@@ -263,92 +713,295 @@ def get_wash_categories():
     return fetch_all("wash_categories")
 
 def validate_user(username, password):
-    conn = get_conn()
-    is_pg = _is_postgres()
-    if is_pg:
-        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-            cur.execute("""
-                SELECT username, role, full_name FROM users
-                WHERE username=%s AND password=%s;
-            """, (username, password))
-            row = cur.fetchone()
-        conn.close()
-        return row if row else None
-    else:
-        row = conn.execute("""
-            SELECT username, role, full_name FROM users
-            WHERE username=? AND password=?;
-        """, (username, password)).fetchone()
-        conn.close()
-        return dict(row) if row else None
+    b = _backend()
+    return b.fetchone(_stmt("validate_user", b.is_pg), (username, password))
 
 def create_user(username, password, role, full_name=None):
     username = username.strip()
     full_name = (full_name or "").strip()
+    b = _backend()
+    b.execute(_stmt("create_user", b.is_pg), (username, password, role, full_name))
+
+def find_entry(style_no, contract_no, laundry_name):
+    """
+    Newest entry with this style/contract/laundry (index lookup), or None.
+    Also None when any part of the key is blank: save_entry never updates
+    those in place, so there is no entry to edit.
+    """
+    if not (style_no and contract_no and laundry_name):
+        return None
+    b = _backend()
+    return b.fetchone(_stmt("find_entry", b.is_pg), (style_no, contract_no, laundry_name))
+
+def entry_archived(style_no, contract_no, laundry_name):
+    """True if this style/contract/laundry was moved to cold storage (frozen)."""
+    if not (style_no and contract_no and laundry_name):
+        return False
+    b = _backend()
+    return b.fetchone(_stmt("entry_archived", b.is_pg), (style_no, contract_no, laundry_name)) is not None
+
+def save_entry(data: dict, upsert=False):
+    """
+    Insert an entry. With upsert=True an existing entry with the same
+    style_no/contract_no/laundry_name is updated instead (its created_at and
+    created_by are kept). Without it, a duplicate key raises IntegrityError
+    once the unique index exists. A key that has been archived is frozen:
+    saving it again raises ValueError.
+    """
+    b = _backend()
+    cols = tuple(data)
+    vals = tuple(data[k] for k in cols)
+    full_key = all(data.get(k) for k in ENTRY_KEY)
+
+    if full_key and entry_archived(*(data[k] for k in ENTRY_KEY)):
+        raise ValueError(
+            f"Entry {'/'.join(data[k] for k in ENTRY_KEY)} is archived (closed period) and can't be saved again."
+        )
+
+    if not upsert or not full_key:
+        b.execute(_insert_sql("entries", cols, b.is_pg), vals)
+        return
+
+    if b.unique_entry_key is None:
+        b.unique_entry_key = b.fetchone(_stmt("entry_key_unique", b.is_pg)) is not None
+
+    if b.unique_entry_key:
+        try:
+            b.execute(_upsert_sql("entries", cols, b.is_pg), vals)
+            return
+        except psycopg2.errors.InvalidColumnReference:
+            # unique index gone since it was checked (entries was partitioned)
+            b.unique_entry_key = False
+
+    # No unique index to conflict on: update the newest match, else insert,
+    # holding a lock so two submissions of the same key can't both insert.
+    key = tuple(data[k] for k in ENTRY_KEY)
+    set_vals = tuple(
+        data[c] for c in cols if c not in ENTRY_KEY and c not in ("created_at", "created_by")
+    )
+    with b.transaction() as pc:
+        if b.is_pg:
+            pc.run(_stmt("entry_key_lock", True), ("|".join(key),))
+        if pc.run(_update_latest_sql("entries", cols, b.is_pg), set_vals + key).rowcount == 0:
+            pc.run(_insert_sql("entries", cols, b.is_pg), vals)
+
+@functools.lru_cache(maxsize=None)
+def _entries_sql(is_pg, sources, cols, has_lower, has_upper, has_factory=False, has_laundry=False):
+    where = []
+    if has_lower:
+        where.append("created_at >= ?")
+    if has_upper:
+        where.append("created_at < ?")
+    if has_factory:
+        where.append("factory_name = ?")
+    if has_laundry:
+        where.append("laundry_name = ?")
+
+    parts = []
+    for src in sources:
+        part = f"SELECT {cols} FROM {src}"
+        if where:
+            part += " WHERE " + " AND ".join(where)
+        parts.append(part)
+
+    return _compile(" UNION ALL ".join(parts) + " ORDER BY created_at DESC;", is_pg)
+
+def _entries_query(is_pg, lower=None, upper=None, sources=("entries",), cols="*",
+                   factory=None, laundry=None):
+    """
+    SELECT over the hot table plus any cold (archived) tables for created_at
+    in [lower, upper), newest first, optionally for one factory and/or laundry.
+    """
+    params = [x for x in (lower, upper, factory, laundry) if x]
+    sql = _entries_sql(is_pg, tuple(sources), cols, bool(lower), bool(upper), bool(factory), bool(laundry))
+    return sql, params * len(sources)
+
+def _entries_spans(conn, is_pg, date_from=None, date_to=None, columns=None):
+    """
+    Yields (sources, cols, lower, upper) per query an entries read needs,
+    newest span first. Postgres: one span over the hot and archived
+    partitions. SQLite: one per group of archive years, attached while its
+    span is read and detached before the next.
+    """
+    lower, upper = _range_bounds(date_from, date_to)
+    if is_pg:
+        yield ["entries"] + _pg_cold_sources(conn, lower, upper), "*", lower, upper
+        return
+    cols = ",".join(columns or _sqlite_entry_columns(conn))
+    for years, lo, hi in _sqlite_year_groups(lower, upper):
+        sources = _sqlite_attach_cold(conn, years)
+        try:
+            yield ["main.entries"] + sources, cols, lo, hi
+        finally:
+            _detach_cold(conn, sources)
+
+def _detach_cold(conn, sources):
+    for src in sources:
+        if src.startswith("arch_"):
+            conn.execute(f"DETACH DATABASE {src.split('.')[0]};")
+
+def read_entries(date_from=None, date_to=None, factory=None, laundry=None):
+    b = _backend()
+    rows = []
+    with b.connection() as pc:
+        if not b.is_pg and b.entry_columns is None:
+            b.entry_columns = _sqlite_entry_columns(pc.conn)
+
+        spans = _entries_spans(pc.conn, b.is_pg, date_from, date_to, b.entry_columns)
+        with contextlib.closing(spans):
+            for sources, cols, lower, upper in spans:
+                sql, params = _entries_query(b.is_pg, lower, upper, sources, cols, factory, laundry)
+                rows += b.fetchall(sql, params)
+    return rows
+
+def iter_entries(date_from=None, date_to=None, factory=None, laundry=None, batch_size=50_000):
+    """
+    Same rows as read_entries() but yielded in batches of dicts, so large
+    exports don't hold the whole range in memory. Postgres uses a
+    server-side (named) cursor.
+    """
     conn = get_conn()
     is_pg = _is_postgres()
-    if is_pg:
+    spans = _entries_spans(conn, is_pg, date_from, date_to)
+
+    try:
+        for sources, cols, lower, upper in spans:
+            sql, params = _entries_query(is_pg, lower, upper, sources, cols, factory, laundry)
+            if is_pg:
+                with conn.cursor("iter_entries", cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                    cur.itersize = batch_size
+                    cur.execute(sql.rstrip(";"), params)
+                    while True:
+                        rows = cur.fetchmany(batch_size)
+                        if not rows:
+                            break
+                        yield [dict(r) for r in rows]
+            else:
+                cur = conn.execute(sql, params)
+                try:
+                    while True:
+                        rows = cur.fetchmany(batch_size)
+                        if not rows:
+                            break
+                        yield [dict(r) for r in rows]
+                finally:
+                    cur.close()  # a pending statement would block the DETACH
+    finally:
+        spans.close()
+        conn.close()
+
+def partition_entries():
+    """
+    Convert a Postgres `entries` table created before partitioning into the
+    monthly-partitioned layout: the old table is renamed to
+    entries_unpartitioned (kept as a backup), a partitioned `entries` with
+    the same columns and id sequence takes its place, and every row is copied
+    into its month's partition. Returns rows copied, or None if entries is
+    already partitioned.
+    """
+    if not _is_postgres():
+        raise RuntimeError("Only Postgres partitions entries; SQLite archives to per-year databases.")
+
+    conn = get_conn()
+    try:
         with conn.cursor() as cur:
+            if _pg_is_partitioned(cur):
+                return None
+            cur.execute("LOCK TABLE entries IN ACCESS EXCLUSIVE MODE;")
+            cur.execute("ALTER TABLE entries RENAME TO entries_unpartitioned;")
+            cur.execute("ALTER TABLE entries_unpartitioned RENAME CONSTRAINT entries_pkey TO entries_unpartitioned_pkey;")
+            cur.execute("ALTER INDEX IF EXISTS idx_entries_created_at RENAME TO idx_entries_unpartitioned_created_at;")
+            cur.execute("ALTER INDEX IF EXISTS idx_entries_entry_key RENAME TO idx_entries_unpartitioned_entry_key;")
+            cur.execute("ALTER INDEX IF EXISTS idx_entries_factory_created RENAME TO idx_entries_unpartitioned_factory_created;")
+            cur.execute("ALTER INDEX IF EXISTS idx_entries_laundry_created RENAME TO idx_entries_unpartitioned_laundry_created;")
+
             cur.execute("""
-                INSERT INTO users(username, password, role, full_name)
-                VALUES(%s,%s,%s,%s);
-            """, (username, password, role, full_name))
-        conn.commit()
-        conn.close()
-    else:
-        conn.execute("""
-            INSERT INTO users(username, password, role, full_name)
-            VALUES(?,?,?,?);
-        """, (username, password, role, full_name))
+                CREATE TABLE entries (
+                    LIKE entries_unpartitioned INCLUDING DEFAULTS,
+                    PRIMARY KEY (id, created_at)
+                ) PARTITION BY RANGE (created_at);
+            """)
+            cur.execute("ALTER SEQUENCE entries_id_seq OWNED BY entries.id;")
+            cur.execute("CREATE TABLE entries_default PARTITION OF entries DEFAULT;")
+            cur.execute("INSERT INTO entries SELECT * FROM entries_unpartitioned;")
+            copied = cur.rowcount
+            _pg_ensure_partitions(cur)
         conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
         conn.close()
 
-def save_entry(data: dict):
-    conn = get_conn()
-    is_pg = _is_postgres()
+    init_db()  # indexes on the new table
+    return copied
 
-    keys = list(data.keys())
-    vals = [data[k] for k in keys]
+def archive_entries(before):
+    """
+    Move entries created before the month containing `before` to cold
+    storage. Only whole (closed) months move. Returns rows/partitions moved.
 
-    if is_pg:
-        placeholders = ",".join(["%s"] * len(keys))
-        cols = ",".join(keys)
+    Postgres: detaches the monthly partitions into the entries_archive schema.
+    SQLite:   moves rows into data/archive/entries_<year>.db.
+    """
+    cutoff = date.fromisoformat(str(before)[:10]).replace(day=1)
+    conn = get_conn()
+
+    if _is_postgres():
+        moved = 0
         with conn.cursor() as cur:
-            cur.execute(f"INSERT INTO entries({cols}) VALUES({placeholders});", vals)
+            if not _pg_is_partitioned(cur):
+                conn.close()
+                raise RuntimeError(
+                    "entries is not a partitioned table (created before partitioning was added); "
+                    "run `python archive.py --partition` first."
+                )
+            # old rows parked in the default partition get their month partition first
+            _pg_ensure_partitions(cur)
+            cur.execute(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA};")
+            archived = {name for name, _ in _pg_month_tables(cur, ARCHIVE_SCHEMA)}
+            for name, month in _pg_month_tables(cur, "public"):
+                if _next_month(month) <= cutoff:
+                    cur.execute(f"ALTER TABLE entries DETACH PARTITION {name};")
+                    cur.execute(_archived_keys_sql(name))
+                    if name in archived:
+                        # month archived before and backfilled since: merge into the cold copy
+                        cur.execute(f"INSERT INTO {ARCHIVE_SCHEMA}.{name} SELECT * FROM {name};")
+                        cur.execute(f"DROP TABLE {name};")
+                    else:
+                        cur.execute(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA};")
+                    moved += 1
         conn.commit()
         conn.close()
-    else:
-        cols = ",".join(keys)
-        qmarks = ",".join(["?"] * len(keys))
-        conn.execute(f"INSERT INTO entries({cols}) VALUES({qmarks});", tuple(vals))
+        return moved
+
+    cols = ",".join(_sqlite_entry_columns(conn))
+    years = [
+        int(r[0]) for r in conn.execute(
+            "SELECT DISTINCT substr(created_at,1,4) FROM entries WHERE created_at < ?;", (str(cutoff),)
+        ).fetchall()
+    ]
+    moved = 0
+    for year in years:
+        path = _sqlite_archive_path(year)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn.execute(f"ATTACH DATABASE ? AS arch_{year};", (path.as_posix(),))
+        conn.execute(f"CREATE TABLE IF NOT EXISTS arch_{year}.entries AS SELECT * FROM main.entries WHERE 0;")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS arch_{year}.idx_entries_created_at ON entries(created_at);")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS arch_{year}.idx_entries_factory_created ON entries(factory_name, created_at);")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS arch_{year}.idx_entries_laundry_created ON entries(laundry_name, created_at);")
         conn.commit()
-        conn.close()
 
-def read_entries(date_from=None, date_to=None):
-    conn = get_conn()
-    is_pg = _is_postgres()
-
-    where = []
-    params = []
-    if date_from:
-        where.append("date(created_at) >= date(%s)" if is_pg else "date(created_at) >= date(?)")
-        params.append(date_from)
-    if date_to:
-        where.append("date(created_at) <= date(%s)" if is_pg else "date(created_at) <= date(?)")
-        params.append(date_to)
-
-    sql = "SELECT * FROM entries"
-    if where:
-        sql += " WHERE " + " AND ".join(where)
-    sql += " ORDER BY created_at DESC;"
+        lo, hi = f"{year}-01-01", min(f"{year + 1}-01-01", str(cutoff))
+        cur = conn.execute(f"""
+            INSERT INTO arch_{year}.entries({cols})
+            SELECT {cols} FROM main.entries WHERE created_at >= ? AND created_at < ?;
+        """, (lo, hi))
+        moved += cur.rowcount
+        conn.execute(_archived_keys_sql("main.entries", " AND created_at >= ? AND created_at < ?"), (lo, hi))
+        conn.execute("DELETE FROM main.entries WHERE created_at >= ? AND created_at < ?;", (lo, hi))
+        conn.commit()
+        conn.execute(f"DETACH DATABASE arch_{year};")
 
-    if is_pg:
-        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-            cur.execute(sql, params)
-            rows = cur.fetchall()
-        conn.close()
-        return rows
-    else:
-        rows = conn.execute(sql, params).fetchall()
-        conn.close()
-        return [dict(r) for r in rows]
+    conn.close()
+    return moved
@@ -0,0 +1,90 @@
+"""
+Dashboard KPI computations on an entries DataFrame (as returned by
+db.read_entries), shared by the Dashboard page and reports.py.
+Everything works on whole columns; nothing iterates rows.
+"""
+import numpy as np
+import pandas as pd
+
+# derived numeric column -> source entries column
+QTY_COLUMNS = {
+    "factory_order": "factory_order_qty",
+    "uk_order": "customer_order_qty",
+    "ship_qty": "total_shipment_qty",
+}
+
+GROUP_KEYS = ["laundry_name", "factory_name", "department_name", "wash_category", "customer_name"]
+
+ISSUE_COLUMNS = ["issue_1", "issue_2", "issue_3", "other_issue_text"]
+
+
+def ratio_pct(num, den):
+    """num / den * 100 element-wise, 0 where den is 0."""
+    num = np.asarray(num, dtype="float64")
+    den = np.asarray(den, dtype="float64")
+    out = np.zeros(np.broadcast(num, den).shape)
+    np.divide(num * 100, den, out=out, where=den != 0)
+    return out
+
+def add_numeric_columns(df):
+    for out, src in QTY_COLUMNS.items():
+        if src in df.columns:
+            df[out] = pd.to_numeric(df[src], errors="coerce").fillna(0)
+        else:
+            df[out] = 0
+    return df
+
+def kpi_totals(df):
+    total_factory_order = df["factory_order"].sum()
+    total_uk_order = df["uk_order"].sum()
+    total_ship = df["ship_qty"].sum()
+
+    return {
+        "total_factory_order": total_factory_order,
+        "total_uk_order": total_uk_order,
+        "total_shipment": total_ship,
+        "factory_ship_pct": float(ratio_pct(total_ship, total_factory_order)),
+        "uk_ship_pct": float(ratio_pct(total_ship, total_uk_order)),
+    }
+
+def performance(df, by="laundry_name"):
+    """
+    Order vs shipment % per group. `by` is one of GROUP_KEYS or a list of
+    them. Sorted by shipment_vs_factory_% descending.
+    """
+    keys = [by] if isinstance(by, str) else list(by)
+    unknown = [k for k in keys if k not in GROUP_KEYS]
+    if unknown:
+        raise ValueError(f"Unknown group key(s): {', '.join(unknown)}")
+
+    perf = df.groupby(keys, as_index=False).agg(
+        factory_order=("factory_order", "sum"),
+        uk_order=("uk_order", "sum"),
+        shipment=("ship_qty", "sum"),
+    )
+
+    perf["shipment_vs_factory_%"] = ratio_pct(perf["shipment"], perf["factory_order"])
+    perf["shipment_vs_uk_%"] = ratio_pct(perf["shipment"], perf["uk_order"])
+    return perf.sort_values("shipment_vs_factory_%", ascending=False)
+
+def laundry_performance(df):
+    return performance(df, "laundry_name")
+
+def top_issues(df, n=3, by="laundry_name"):
+    """Most frequent wash issues (issue_1..3 + other issue text) per group."""
+    cols = [c for c in ISSUE_COLUMNS if c in df.columns]
+    if not cols or df.empty:
+        return pd.DataFrame(columns=[by, "issue", "count"])
+
+    group = df[by] if by in df.columns else pd.Series("", index=df.index)
+    long_df = pd.DataFrame({
+        by: np.tile(group.fillna("").astype(str).str.strip().to_numpy(), len(cols)),
+        "issue": pd.concat([df[c] for c in cols], ignore_index=True).fillna("").astype(str).str.strip().to_numpy(),
+    })
+    long_df = long_df[long_df["issue"] != ""]
+    if long_df.empty:
+        return pd.DataFrame(columns=[by, "issue", "count"])
+
+    top = long_df.groupby([by, "issue"]).size().reset_index(name="count")
+    top = top.sort_values([by, "count"], ascending=[True, False])
+    return top.groupby(by).head(n)
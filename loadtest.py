@@ -0,0 +1,212 @@
+"""
+Load test: N simulated users hitting the same db/reports code paths the
+Streamlit pages use (Data Entry save, Dashboard render, Export build).
+
+    python loadtest.py --sqlite data/loadtest.db --seed 20000 --users 1,4,16,32 --duration 20
+    DATABASE_URL=postgresql://localhost/laundry PGSSLMODE=disable python loadtest.py --users 1,8,32
+
+Prints throughput, latency percentiles and lock/error rates per
+concurrency level.
+"""
+import argparse
+import csv
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import psycopg2
+import psycopg2.errors
+from dateutil.relativedelta import relativedelta
+
+import db
+import kpis
+import reports
+
+DEFAULT_MIX = "save=0.7,dashboard=0.25,export=0.05"
+
+LOCK_ERRORS = (
+    psycopg2.errors.LockNotAvailable,
+    psycopg2.errors.DeadlockDetected,
+    psycopg2.errors.SerializationFailure,
+)
+
+
+# ----------------- SIMULATED PAGE ACTIONS -----------------
+def _fake_entry(rng, masters, created_at=None):
+    return {
+        "created_at": (created_at or datetime.now()).strftime("%Y-%m-%d %H:%M:%S"),
+        "created_by": "loadtest",
+        "customer_name": rng.choice(masters["customers"]),
+        "style_no": f"LT-{rng.randint(1, 5000)}",
+        "contract_no": f"C-{rng.randint(1, 500)}",
+        "customer_order_qty": rng.randint(0, 5000),
+        "factory_order_qty": rng.randint(0, 5000),
+        "total_shipment_qty": rng.randint(0, 5000),
+        "wash_receive_qty": rng.randint(0, 5000),
+        "wash_delivery_qty": rng.randint(0, 5000),
+        "factory_name": rng.choice(masters["factories"]),
+        "laundry_name": rng.choice(masters["laundries"]),
+        "department_name": rng.choice(masters["departments"]),
+        "wash_category": rng.choice(masters["wash_categories"]),
+        "subcontract_washing": rng.choice(["NO", "YES"]),
+        "issue_1": rng.choice([""] + masters["wash_issues"]),
+        "issue_2": rng.choice([""] + masters["wash_issues"]),
+        "issue_3": "",
+        "other_issue_text": "",
+        "remarks": "",
+        "image_path": "",
+    }
+
+def op_save(rng, masters, months):
+    db.save_entry(_fake_entry(rng, masters), upsert=True)
+
+def op_dashboard(rng, masters, months):
+    df = reports.load_entries(date.today() - relativedelta(months=months), date.today())
+    if df.empty:
+        return
+    df = kpis.add_numeric_columns(df)
+    kpis.kpi_totals(df)
+    kpis.laundry_performance(df)
+    kpis.top_issues(df)
+
+def op_export(rng, masters, months):
+    df = reports.load_entries(date.today() - relativedelta(months=1), date.today())
+    if df.empty:
+        return
+    reports.build_export_zip(reports.add_image_rel_path(df))
+
+OPS = {"save": op_save, "dashboard": op_dashboard, "export": op_export}
+
+
+# ----------------- SETUP -----------------
+def ensure_masters():
+    masters = {}
+    for table in ["laundries", "factories", "departments", "customers", "wash_categories", "wash_issues"]:
+        names = [r["name"] for r in db.fetch_all(table)]
+        if not names:
+            for i in range(1, 4):
+                db.add_master(table, f"LT {table} {i}")
+            names = [r["name"] for r in db.fetch_all(table)]
+        masters[table] = names
+    return masters
+
+def seed_entries(n, masters, days=365):
+    rng = random.Random(0)
+    now = datetime.now()
+    for _ in range(n):
+        db.save_entry(_fake_entry(rng, masters, now - timedelta(seconds=rng.randint(0, days * 86400))), upsert=True)
+
+
+# ----------------- RUNNER -----------------
+def _classify(exc):
+    if isinstance(exc, LOCK_ERRORS):
+        return "lock"
+    if isinstance(exc, sqlite3.OperationalError) and ("locked" in str(exc) or "busy" in str(exc)):
+        return "lock"
+    return "error"
+
+def _percentile(sorted_vals, p):
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, round(p / 100 * (len(sorted_vals) - 1))))
+    return sorted_vals[k]
+
+def run_level(users, duration, mix, masters, months):
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    samples = []  # (op, seconds, outcome)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def user(uid):
+        rng = random.Random(uid)
+        local = []
+        while time.perf_counter() < deadline:
+            op = rng.choices(names, weights)[0]
+            t0 = time.perf_counter()
+            try:
+                OPS[op](rng, masters, months)
+                outcome = "ok"
+            except Exception as e:
+                outcome = _classify(e)
+            local.append((op, time.perf_counter() - t0, outcome))
+        with lock:
+            samples.extend(local)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        list(pool.map(user, range(users)))
+    elapsed = time.perf_counter() - t0
+
+    rows = []
+    for op in names + ["all"]:
+        sel = [s for s in samples if op == "all" or s[0] == op]
+        if not sel:
+            continue
+        lat = sorted(s[1] * 1000 for s in sel if s[2] == "ok")
+        rows.append({
+            "users": users,
+            "op": op,
+            "count": len(sel),
+            "ops_per_s": round(len(sel) / elapsed, 1),
+            "p50_ms": round(_percentile(lat, 50), 1),
+            "p95_ms": round(_percentile(lat, 95), 1),
+            "p99_ms": round(_percentile(lat, 99), 1),
+            "lock_%": round(100 * sum(s[2] == "lock" for s in sel) / len(sel), 2),
+            "error_%": round(100 * sum(s[2] == "error" for s in sel) / len(sel), 2),
+        })
+    return rows
+
+def _parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPS:
+            raise argparse.ArgumentTypeError(f"unknown op {name!r} (choose from {', '.join(OPS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Concurrent load test for the Laundry KPI db/report paths.")
+    ap.add_argument("--sqlite", help="SQLite file to test against (ignored when DATABASE_URL is set)")
+    ap.add_argument("--users", default="1,4,16", help="comma-separated concurrency levels")
+    ap.add_argument("--duration", type=float, default=10, help="seconds per concurrency level")
+    ap.add_argument("--mix", type=_parse_mix, default=_parse_mix(DEFAULT_MIX))
+    ap.add_argument("--months", type=int, default=6, help="dashboard range in months")
+    ap.add_argument("--seed", type=int, default=0, help="insert this many backdated entries first")
+    ap.add_argument("--csv", help="also write results to this CSV file")
+    args = ap.parse_args(argv)
+
+    if args.sqlite and not db._is_postgres():
+        db.DB_PATH = Path(args.sqlite)
+
+    db.init_db()
+    masters = ensure_masters()
+    if args.seed:
+        seed_entries(args.seed, masters)
+        db.init_db()  # Postgres: move the backdated rows out of the default partition
+
+    results = []
+    for users in [int(u) for u in args.users.split(",")]:
+        rows = run_level(users, args.duration, args.mix, masters, args.months)
+        results.extend(rows)
+        for r in rows:
+            print(
+                f"users={r['users']:<4} {r['op']:<10} n={r['count']:<6} {r['ops_per_s']:>8}/s  "
+                f"p50={r['p50_ms']:>8}ms p95={r['p95_ms']:>8}ms p99={r['p99_ms']:>8}ms  "
+                f"lock={r['lock_%']}% err={r['error_%']}%"
+            )
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=list(results[0]))
+            w.writeheader()
+            w.writerows(results)
+
+if __name__ == "__main__":
+    main()
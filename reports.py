@@ -0,0 +1,271 @@
+"""
+Export logic shared by the Streamlit pages (app.py) and the
+headless report generator:
+
+    python reports.py --preset "Last 1 Month" --all-laundries --out reports/
+    python reports.py --from 2024-01-01 --to 2024-06-30 --factory "F1" --factory "F2" --out reports/
+    python reports.py --preset "Last 1 Year" --format parquet --out reports/
+"""
+import argparse
+import io
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dateutil.relativedelta import relativedelta
+
+import db
+import kpis
+
+RANGE_PRESETS = ["Custom", "Last 1 Month", "Last 6 Months", "Last 1 Year"]
+EXPORT_FORMATS = ["csv", "parquet"]
+
+_NAME = pa.dictionary(pa.int32(), pa.string())
+
+# Typed layout of the entries table for Parquet exports. Master-name
+# columns (few distinct values, repeated on every row) are dictionary-encoded.
+ENTRIES_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("created_at", pa.timestamp("s")),
+    ("created_by", _NAME),
+    ("customer_name", _NAME),
+    ("style_no", pa.string()),
+    ("contract_no", pa.string()),
+    ("customer_order_qty", pa.int64()),
+    ("factory_order_qty", pa.int64()),
+    ("total_shipment_qty", pa.int64()),
+    ("wash_receive_qty", pa.int64()),
+    ("wash_delivery_qty", pa.int64()),
+    ("pcd_date", pa.date32()),
+    ("planned_pcd_date", pa.date32()),
+    ("actual_pcd_date", pa.date32()),
+    ("agreed_ex_factory", pa.date32()),
+    ("actual_ex_factory", pa.date32()),
+    ("wash_receive_date", pa.date32()),
+    ("wash_closing_date", pa.date32()),
+    ("shade_band_submission_date", pa.date32()),
+    ("shade_band_approval_date", pa.date32()),
+    ("factory_name", _NAME),
+    ("laundry_name", _NAME),
+    ("department_name", _NAME),
+    ("wash_category", _NAME),
+    ("subcontract_washing", _NAME),
+    ("issue_1", _NAME),
+    ("issue_2", _NAME),
+    ("issue_3", _NAME),
+    ("other_issue_text", pa.string()),
+    ("remarks", pa.string()),
+    ("image_path", pa.string()),
+    ("image_rel_path", pa.string()),
+])
+
+
+# ----------------- RANGE / DATA -----------------
+def resolve_range(preset, d_from, d_to):
+    if preset == "Custom":
+        return d_from, d_to
+    if preset == "Last 1 Month":
+        d_from = date.today() - relativedelta(months=1)
+    elif preset == "Last 6 Months":
+        d_from = date.today() - relativedelta(months=6)
+    elif preset == "Last 1 Year":
+        d_from = date.today() - relativedelta(years=1)
+    return d_from, date.today()
+
+def _selected(value):
+    """A factory/laundry choice, or None for "All" / not given."""
+    return value if value and value != "All" else None
+
+def load_entries(d_from, d_to, factory=None, laundry=None):
+    return pd.DataFrame(db.read_entries(str(d_from), str(d_to), _selected(factory), _selected(laundry)))
+
+
+# ----------------- EXPORT (ZIP: CSV + IMAGES) -----------------
+def add_image_rel_path(df):
+    if "image_path" not in df.columns:
+        df["image_path"] = ""
+
+    def rel_img(p):
+        if not p:
+            return ""
+        return "images/" + Path(p).name
+
+    df["image_rel_path"] = df["image_path"].apply(rel_img)
+    return df
+
+def build_export_zip(df):
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        # CSV
+        zf.writestr("entries.csv", df.to_csv(index=False).encode("utf-8"))
+
+        # Images folder
+        for p in df["image_path"].dropna().unique():
+            if p and os.path.exists(p):
+                zf.write(p, arcname=f"images/{Path(p).name}")
+
+        zf.writestr(
+            "README.txt",
+            "Unzip this file.\n"
+            "entries.csv contains image_rel_path column.\n"
+            "Images are stored inside images/ folder.\n"
+        )
+
+    return zip_buffer.getvalue()
+
+
+# ----------------- EXPORT (PARQUET) -----------------
+def _arrow_batch(rows):
+    df = pd.DataFrame(rows)
+    for field in ENTRIES_SCHEMA:
+        if field.name not in df.columns:
+            df[field.name] = None
+    df = add_image_rel_path(df)
+
+    arrays = []
+    for field in ENTRIES_SCHEMA:
+        col = df[field.name]
+        if pa.types.is_timestamp(field.type):
+            col = pd.to_datetime(col, errors="coerce")
+        elif pa.types.is_date(field.type):
+            col = pd.to_datetime(col, errors="coerce").dt.date
+        elif pa.types.is_integer(field.type):
+            col = pd.to_numeric(col, errors="coerce").astype("Int64")
+        else:
+            col = col.astype("object").where(col.notna(), None)
+        arrays.append(pa.array(col, type=field.type, from_pandas=True))
+    return pa.Table.from_arrays(arrays, schema=ENTRIES_SCHEMA)
+
+def write_entries_parquet(sink, d_from, d_to, factory=None, laundry=None, batch_size=50_000):
+    """
+    Streams entries from the database into a zstd-compressed Parquet file,
+    one row group per batch. Returns the number of rows written.
+    """
+    n = 0
+    with pq.ParquetWriter(sink, ENTRIES_SCHEMA, compression="zstd") as writer:
+        batches = db.iter_entries(
+            str(d_from), str(d_to), _selected(factory), _selected(laundry), batch_size=batch_size
+        )
+        for rows in batches:
+            writer.write_table(_arrow_batch(rows))
+            n += len(rows)
+    return n
+
+def build_export_parquet(d_from, d_to, factory=None, laundry=None):
+    """(parquet bytes, row count)"""
+    buf = io.BytesIO()
+    n = write_entries_parquet(buf, d_from, d_to, factory, laundry)
+    return buf.getvalue(), n
+
+def parquet_preview(data, rows=200):
+    """First rows of an exported Parquet file, without reading the rest."""
+    batch = next(pq.ParquetFile(io.BytesIO(data)).iter_batches(batch_size=rows), None)
+    if batch is None:
+        return pd.DataFrame(columns=ENTRIES_SCHEMA.names)
+    return batch.to_pandas()
+
+def read_parquet_kpi_columns(path):
+    """Just the columns the KPI tables need, with dictionary columns as plain strings."""
+    df = pq.read_table(path, columns=_kpi_source_columns()).to_pandas()
+    for col in df.select_dtypes("category").columns:
+        df[col] = df[col].astype(object)
+    return df
+
+
+# ----------------- HEADLESS REPORTS -----------------
+def _slug(s):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", s).strip("_") or "all"
+
+def _kpi_source_columns():
+    return kpis.GROUP_KEYS + list(kpis.QTY_COLUMNS.values()) + kpis.ISSUE_COLUMNS
+
+def _empty_entries():
+    return pd.DataFrame(columns=_kpi_source_columns())
+
+def _write_kpis(folder, df):
+    df = kpis.add_numeric_columns(df)
+    pd.DataFrame([kpis.kpi_totals(df)]).to_csv(folder / "kpi_summary.csv", index=False)
+    kpis.laundry_performance(df).to_csv(folder / "laundry_performance.csv", index=False)
+    kpis.top_issues(df).to_csv(folder / "top_issues.csv", index=False)
+
+def generate_report(d_from, d_to, out_dir, factory=None, laundry=None, fmt="csv"):
+    """
+    Writes the export (CSV ZIP or Parquet) and the dashboard KPI tables for one
+    factory/laundry selection into out_dir/<selection>/.
+    Returns (folder, row_count).
+    """
+    label = "_".join(_slug(x) for x in (factory, laundry) if x) or "all"
+    folder = Path(out_dir) / label
+    folder.mkdir(parents=True, exist_ok=True)
+
+    if fmt == "parquet":
+        # stream the export, then compute KPIs from the file's KPI columns only
+        path = folder / f"laundry_export_{d_from}_to_{d_to}.parquet"
+        n = write_entries_parquet(path, d_from, d_to, factory, laundry)
+        _write_kpis(folder, read_parquet_kpi_columns(path) if n else _empty_entries())
+        return folder.as_posix(), n
+
+    df = load_entries(d_from, d_to, factory, laundry)
+    if df.empty:
+        # zero-total / header-only KPI files, so "no data" is distinguishable from a failed run
+        _write_kpis(folder, _empty_entries())
+        return folder.as_posix(), 0
+
+    df = add_image_rel_path(df)
+    (folder / f"laundry_export_{d_from}_to_{d_to}.zip").write_bytes(build_export_zip(df))
+
+    _write_kpis(folder, df)
+    return folder.as_posix(), len(df)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Generate Laundry KPI export ZIPs and KPI summaries without Streamlit.")
+    ap.add_argument("--preset", choices=RANGE_PRESETS, default="Custom")
+    ap.add_argument("--from", dest="d_from", type=date.fromisoformat,
+                    default=date.today() - relativedelta(months=1))
+    ap.add_argument("--to", dest="d_to", type=date.fromisoformat, default=date.today())
+    ap.add_argument("--factory", action="append", default=[], help="repeatable; one report per factory")
+    ap.add_argument("--laundry", action="append", default=[], help="repeatable; one report per laundry")
+    ap.add_argument("--all-factories", action="store_true")
+    ap.add_argument("--all-laundries", action="store_true")
+    ap.add_argument("--format", choices=EXPORT_FORMATS, default="csv",
+                    help="csv = ZIP (CSV + images), parquet = typed entries.parquet")
+    ap.add_argument("--out", default="reports")
+    ap.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    args = ap.parse_args(argv)
+
+    d_from, d_to = resolve_range(args.preset, args.d_from, args.d_to)
+
+    factories = args.factory
+    laundries = args.laundry
+    if args.all_factories:
+        factories = [r["name"] for r in db.fetch_all("factories")]
+    if args.all_laundries:
+        laundries = [r["name"] for r in db.fetch_all("laundries")]
+
+    jobs = [(f, l) for f in (factories or [None]) for l in (laundries or [None])]
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(generate_report, d_from, d_to, args.out, f, l, args.format): (f, l)
+            for f, l in jobs
+        }
+        failed = 0
+        for fut in as_completed(futures):
+            f, l = futures[fut]
+            try:
+                folder, n = fut.result()
+                print(f"{folder}: {n} rows")
+            except Exception as e:
+                failed += 1
+                print(f"factory={f or 'All'} laundry={l or 'All'}: FAILED ({e})")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,307 @@
+import sqlite3
+import threading
+import time
+from datetime import date
+
+import pytest
+
+import db
+
+
+@pytest.fixture(autouse=True)
+def sqlite_db(tmp_path, monkeypatch):
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "app.db")
+    db.init_db()
+    return tmp_path
+
+
+def _entry(created_at, style_no="S1", contract_no="C1", laundry_name="L1", **kw):
+    return {
+        "created_at": created_at,
+        "created_by": "tester",
+        "style_no": style_no,
+        "contract_no": contract_no,
+        "laundry_name": laundry_name,
+        **kw,
+    }
+
+def _hot_rows():
+    with db._backend().connection() as pc:
+        return [dict(r) for r in pc.conn.execute("SELECT * FROM entries ORDER BY id;").fetchall()]
+
+def _attached():
+    with db._backend().connection() as pc:
+        return [r["name"] for r in pc.conn.execute("PRAGMA database_list;").fetchall()]
+
+
+# ----------------- HOT / COLD (ARCHIVE) -----------------
+def test_archive_entries_moves_closed_months(sqlite_db):
+    db.save_entry(_entry("2024-03-05 10:00:00", "S1"))
+    db.save_entry(_entry("2025-06-30 23:59:59", "S2"))
+    db.save_entry(_entry("2025-07-01 00:00:00", "S3"))
+
+    assert db.archive_entries(date(2025, 7, 15)) == 2
+
+    assert [r["style_no"] for r in _hot_rows()] == ["S3"]
+    assert (sqlite_db / "archive" / "entries_2024.db").exists()
+    assert (sqlite_db / "archive" / "entries_2025.db").exists()
+    assert db.archive_entries(date(2025, 7, 15)) == 0
+
+def test_read_entries_unions_hot_and_cold(sqlite_db):
+    for i, ts in enumerate(["2024-03-05 10:00:00", "2025-02-01 09:00:00", "2026-01-10 08:00:00"]):
+        db.save_entry(_entry(ts, f"S{i}", laundry_name=f"L{i % 2}"))
+    db.archive_entries(date(2026, 1, 1))
+
+    rows = db.read_entries("2024-01-01", "2026-12-31")
+    assert [r["style_no"] for r in rows] == ["S2", "S1", "S0"]
+    assert [r["style_no"] for r in db.read_entries("2025-01-01", "2025-12-31")] == ["S1"]
+    assert [r["style_no"] for r in db.read_entries("2024-01-01", "2026-12-31", laundry="L0")] == ["S2", "S0"]
+
+    batches = list(db.iter_entries("2024-01-01", "2026-12-31", batch_size=2))
+    assert [len(b) for b in batches] == [2, 1]
+    assert [r["style_no"] for b in batches for r in b] == ["S2", "S1", "S0"]
+    assert _attached() == ["main"]
+
+def test_read_entries_more_than_ten_archived_years(sqlite_db):
+    for year in range(2010, 2023):
+        db.save_entry(_entry(f"{year}-06-01 12:00:00", f"S{year}"))
+    db.archive_entries(date(2023, 1, 1))
+    assert len(list((sqlite_db / "archive").glob("*.db"))) == 13
+
+    # saved after archiving: backdated rows stay hot next to the archived years
+    db.save_entry(_entry("2015-12-31 23:00:00", "late"))
+    db.save_entry(_entry("2026-01-01 00:00:00", "S2026"))
+
+    expected = ["S2026"] + [f"S{y}" for y in range(2022, 2015, -1)] + ["late"] + [f"S{y}" for y in range(2015, 2009, -1)]
+    rows = db.read_entries("2010-01-01", "2026-12-31")
+    assert [r["style_no"] for r in rows] == expected
+    assert [r["style_no"] for r in db.read_entries()] == expected
+    assert [r["style_no"] for b in db.iter_entries("2010-01-01", "2026-12-31", batch_size=4) for r in b] == expected
+    assert [r["style_no"] for r in db.read_entries("2011-01-01", "2012-12-31")] == ["S2012", "S2011"]
+    assert _attached() == ["main"]
+
+def test_iter_entries_stopped_early_leaves_nothing_attached(sqlite_db):
+    for year in range(2010, 2023):
+        db.save_entry(_entry(f"{year}-06-01 12:00:00", f"S{year}"))
+    db.archive_entries(date(2023, 1, 1))
+
+    batches = db.iter_entries(batch_size=1)
+    assert next(batches)[0]["style_no"] == "S2022"
+    batches.close()
+
+    assert len(db.read_entries()) == 13
+    assert _attached() == ["main"]
+
+def test_sqlite_year_groups_cover_range(monkeypatch):
+    monkeypatch.setattr(db, "_sqlite_archive_years", lambda: list(range(2000, 2020)))
+    groups = db._sqlite_year_groups("2001-05-01", None)
+
+    assert [len(g) for g, _, _ in groups] == [9, 9, 1]
+    assert sorted(y for g, _, _ in groups for y in g) == list(range(2001, 2020))
+    assert [(lo, hi) for _, lo, hi in groups] == [
+        ("2011-01-01", None), ("2002-01-01", "2011-01-01"), ("2001-05-01", "2002-01-01"),
+    ]
+
+
+# ----------------- CONNECTION POOL -----------------
+def test_pool_reuses_connection_across_threads():
+    seen = []
+
+    def work():
+        db.fetch_all("laundries")
+        with db._backend().connection() as pc:
+            seen.append(pc.conn)
+
+    for _ in range(3):
+        t = threading.Thread(target=work)
+        t.start()
+        t.join()
+
+    assert len({id(c) for c in seen}) == 1
+    assert db._backend()._idle.qsize() == 1
+
+def test_pool_nested_calls_share_connection():
+    b = db._backend()
+    with b.connection() as outer:
+        db.add_master("laundries", "L1")
+        assert db.fetch_all("laundries")[0]["name"] == "L1"
+        with b.connection() as inner:
+            assert inner is outer
+    assert b._idle.qsize() == 1
+
+def test_pool_caps_open_connections(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "2")
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "capped.db")
+    db.init_db()
+    b = db._backend()
+    lock = threading.Lock()
+    held, peak = [0], [0]
+
+    def work():
+        with b.connection():
+            with lock:
+                held[0] += 1
+                peak[0] = max(peak[0], held[0])
+            time.sleep(0.02)
+            db.fetch_all("laundries")
+            with lock:
+                held[0] -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert peak[0] == 2
+    assert b._idle.qsize() == 2
+
+def test_backend_per_database(tmp_path, monkeypatch):
+    first = db._backend()
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "other.db")
+    assert db._backend() is not first
+    assert db._backend() is db._backend()
+
+def test_forked_child_gets_new_backends(monkeypatch):
+    monkeypatch.setattr(db, "_backends", dict(db._backends))
+    monkeypatch.setattr(db, "_inherited", [])
+    monkeypatch.setattr(db, "_backends_lock", db._backends_lock)
+    parent = db._backend()
+
+    db._after_fork_in_child()
+
+    assert db._backend() is not parent
+    assert parent in db._inherited
+
+
+# ----------------- ENTRY KEY / UPSERT -----------------
+def test_find_entry_blank_key_is_none():
+    db.save_entry(_entry("2026-01-01 10:00:00", "", "", "L1"))
+    db.save_entry(_entry("2026-01-01 10:00:00", "S1", "C1", ""))
+
+    assert db.find_entry("", "", "L1") is None
+    assert db.find_entry("S1", "C1", "") is None
+    assert db.find_entry("S1", "", "L1") is None
+
+def test_find_then_save_blank_key_inserts():
+    db.save_entry(_entry("2026-01-01 10:00:00", "", ""), upsert=True)
+    assert db.find_entry("", "", "L1") is None
+    db.save_entry(_entry("2026-01-02 10:00:00", "", ""), upsert=True)
+    assert len(_hot_rows()) == 2
+
+
+def _entry_key_index():
+    with db._backend().connection() as pc:
+        return pc.conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type='index' AND name='idx_entries_entry_key';"
+        ).fetchone()["sql"]
+
+@pytest.fixture(params=["on_conflict", "locked"])
+def upsert_path(request):
+    """Runs a test through ON CONFLICT and through the locked update-or-insert fallback."""
+    db._backend().unique_entry_key = request.param == "on_conflict"
+    return request.param
+
+def test_unique_entry_key_index_is_partial():
+    sql = _entry_key_index()
+    assert sql.startswith("CREATE UNIQUE INDEX")
+    assert db._ENTRY_KEY_PRED in sql
+
+def test_plain_save_of_duplicate_key_raises():
+    db.save_entry(_entry("2026-01-01 10:00:00"))
+    with pytest.raises(sqlite3.IntegrityError):
+        db.save_entry(_entry("2026-01-02 10:00:00"))
+
+def test_entry_key_index_falls_back_to_plain_with_duplicates():
+    with db._backend().connection() as pc:
+        pc.conn.execute("DROP INDEX idx_entries_entry_key;")
+        pc.conn.commit()
+    db.save_entry(_entry("2026-01-01 10:00:00", remarks="old"))
+    db.save_entry(_entry("2026-01-02 10:00:00", remarks="new"))
+
+    db.init_db()
+    assert _entry_key_index().startswith("CREATE INDEX")
+
+    # no unique index to conflict on: the newest duplicate is updated
+    db.save_entry(_entry("2026-01-03 10:00:00", remarks="edited"), upsert=True)
+    assert [r["remarks"] for r in db.read_entries()] == ["edited", "old"]
+
+def test_stale_entry_key_index_is_replaced():
+    with db._backend().connection() as pc:
+        pc.conn.execute("DROP INDEX idx_entries_entry_key;")
+        pc.conn.execute(
+            "CREATE UNIQUE INDEX idx_entries_entry_key ON entries(style_no,contract_no,laundry_name) "
+            "WHERE style_no <> '' AND contract_no <> '';"
+        )
+        pc.conn.commit()
+
+    db.init_db()
+    assert db._ENTRY_KEY_PRED in _entry_key_index()
+
+def test_upsert_updates_in_place(upsert_path):
+    db.save_entry(_entry("2026-01-01 10:00:00", factory_order_qty=5, remarks="first"), upsert=True)
+    db.save_entry(
+        {**_entry("2026-02-01 10:00:00", factory_order_qty=7, remarks="second"), "created_by": "editor"},
+        upsert=True,
+    )
+
+    rows = _hot_rows()
+    assert len(rows) == 1
+    assert (rows[0]["created_at"], rows[0]["created_by"]) == ("2026-01-01 10:00:00", "tester")
+    assert (rows[0]["factory_order_qty"], rows[0]["remarks"]) == (7, "second")
+    assert db.find_entry("S1", "C1", "L1")["id"] == rows[0]["id"]
+
+def test_upsert_keeps_image_path_when_empty(upsert_path):
+    db.save_entry(_entry("2026-01-01 10:00:00", image_path="uploads/a.jpg"), upsert=True)
+    db.save_entry(_entry("2026-01-02 10:00:00", image_path=""), upsert=True)
+    assert _hot_rows()[0]["image_path"] == "uploads/a.jpg"
+
+    db.save_entry(_entry("2026-01-03 10:00:00", image_path="uploads/b.jpg"), upsert=True)
+    assert _hot_rows()[0]["image_path"] == "uploads/b.jpg"
+
+def test_upsert_other_keys_insert(upsert_path):
+    db.save_entry(_entry("2026-01-01 10:00:00"), upsert=True)
+    db.save_entry(_entry("2026-01-01 10:00:00", laundry_name="L2"), upsert=True)
+    db.save_entry(_entry("2026-01-01 10:00:00", contract_no="C2"), upsert=True)
+    assert len(_hot_rows()) == 3
+
+def test_upsert_blank_laundry_inserts_twice(upsert_path):
+    db.save_entry(_entry("2026-01-01 10:00:00", laundry_name=""), upsert=True)
+    db.save_entry(_entry("2026-01-01 10:00:00", laundry_name=""), upsert=True)
+    assert len(_hot_rows()) == 2
+
+
+# ----------------- ARCHIVED (FROZEN) KEYS -----------------
+def test_archived_key_is_frozen():
+    db.save_entry(_entry("2024-03-05 10:00:00", "S1", "C1", "L1", factory_order_qty=5), upsert=True)
+    db.save_entry(_entry("2024-03-06 10:00:00", "", "", "L1"), upsert=True)
+    db.archive_entries(date(2025, 1, 1))
+
+    assert db.entry_archived("S1", "C1", "L1")
+    assert not db.entry_archived("S1", "C1", "L2")
+    assert not db.entry_archived("", "", "L1")
+    with pytest.raises(ValueError, match="archived"):
+        db.save_entry(_entry("2026-01-01 10:00:00", "S1", "C1", "L1", factory_order_qty=9), upsert=True)
+    with pytest.raises(ValueError, match="archived"):
+        db.save_entry(_entry("2026-01-01 10:00:00", "S1", "C1", "L1"))
+
+    db.save_entry(_entry("2026-01-01 10:00:00", "S1", "C1", "L2"), upsert=True)
+    db.save_entry(_entry("2026-01-01 10:00:00", "", "", "L1"), upsert=True)
+    rows = db.read_entries()
+    assert len(rows) == 4
+    assert [r["factory_order_qty"] for r in rows if r["laundry_name"] == "L1" and r["style_no"] == "S1"] == [5]
+
+def test_archived_keys_rebuilt_from_existing_archives():
+    db.save_entry(_entry("2023-03-05 10:00:00", "S1"), upsert=True)
+    db.save_entry(_entry("2024-03-05 10:00:00", "S2"), upsert=True)
+    db.archive_entries(date(2025, 1, 1))
+    with db._backend().connection() as pc:
+        pc.conn.execute("DROP TABLE archived_entry_keys;")
+        pc.conn.commit()
+
+    db.init_db()
+
+    assert db.entry_archived("S1", "C1", "L1")
+    assert db.entry_archived("S2", "C1", "L1")
+    assert _attached() == ["main"]
@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import kpis
+
+
+def _entries():
+    df = pd.DataFrame({
+        "laundry_name": ["L1", "L1", "L2", "L3"],
+        "factory_name": ["F1", "F2", "F1", "F2"],
+        "department_name": ["D1", "D1", "D2", "D2"],
+        "wash_category": ["W1", "W2", "W1", "W1"],
+        "customer_name": ["C1", "C1", "C1", "C2"],
+        "factory_order_qty": [100, 100, 0, "50"],
+        "customer_order_qty": [200, None, 0, 50],
+        "total_shipment_qty": [90, 60, 10, 25],
+    })
+    return kpis.add_numeric_columns(df)
+
+
+# ----------------- ratio_pct -----------------
+def test_ratio_pct_zero_denominator_is_zero():
+    np.testing.assert_array_equal(kpis.ratio_pct([50, 7, 0], [100, 0, 0]), [50.0, 0.0, 0.0])
+
+def test_ratio_pct_scalars():
+    assert kpis.ratio_pct(30, 60) == 50.0
+    assert kpis.ratio_pct(30, 0) == 0.0
+
+def test_ratio_pct_broadcast_denominator():
+    np.testing.assert_array_equal(kpis.ratio_pct([1, 2, 3], 4), [25.0, 50.0, 75.0])
+    np.testing.assert_array_equal(kpis.ratio_pct([1, 2, 3], 0), [0.0, 0.0, 0.0])
+    np.testing.assert_array_equal(kpis.ratio_pct(5, [0, 10]), [0.0, 50.0])
+
+def test_ratio_pct_broadcast_shape():
+    out = kpis.ratio_pct(np.ones((2, 1)), np.array([0, 1, 2]))
+    np.testing.assert_array_equal(out, [[0.0, 100.0, 50.0]] * 2)
+
+def test_ratio_pct_series():
+    out = kpis.ratio_pct(pd.Series([1.0, 2.0]), pd.Series([0, 8]))
+    np.testing.assert_array_equal(out, [0.0, 25.0])
+
+
+# ----------------- add_numeric_columns / kpi_totals -----------------
+def test_add_numeric_columns_coerces_and_fills():
+    df = _entries()
+    assert df["factory_order"].tolist() == [100, 100, 0, 50]
+    assert df["uk_order"].tolist() == [200, 0, 0, 50]
+
+def test_add_numeric_columns_missing_source():
+    df = kpis.add_numeric_columns(pd.DataFrame({"laundry_name": ["L1"]}))
+    assert df[["factory_order", "uk_order", "ship_qty"]].iloc[0].tolist() == [0, 0, 0]
+
+def test_kpi_totals_zero_orders():
+    df = kpis.add_numeric_columns(pd.DataFrame({"total_shipment_qty": [5]}))
+    kpi = kpis.kpi_totals(df)
+    assert kpi["factory_ship_pct"] == 0.0
+    assert kpi["uk_ship_pct"] == 0.0
+    assert kpi["total_shipment"] == 5
+
+
+# ----------------- performance -----------------
+@pytest.mark.parametrize("by", kpis.GROUP_KEYS)
+def test_performance_each_group_key(by):
+    df = _entries()
+    perf = kpis.performance(df, by)
+
+    assert list(perf.columns[:1]) == [by]
+    assert sorted(perf[by]) == sorted(df[by].unique())
+    assert perf["shipment"].sum() == df["ship_qty"].sum()
+    assert perf["shipment_vs_factory_%"].is_monotonic_decreasing
+    expected = kpis.ratio_pct(perf["shipment"], perf["factory_order"])
+    np.testing.assert_allclose(perf["shipment_vs_factory_%"], expected)
+
+def test_performance_values_and_zero_orders():
+    perf = kpis.performance(_entries(), "laundry_name").set_index("laundry_name")
+    assert perf.loc["L1", "shipment_vs_factory_%"] == 75.0
+    assert perf.loc["L1", "shipment_vs_uk_%"] == 75.0
+    assert perf.loc["L2", "shipment_vs_factory_%"] == 0.0
+    assert perf.loc["L2", "shipment_vs_uk_%"] == 0.0
+
+def test_performance_list_of_keys():
+    perf = kpis.performance(_entries(), ["factory_name", "department_name"])
+    assert list(perf.columns[:2]) == ["factory_name", "department_name"]
+    assert len(perf) == 4
+    row = perf[(perf["factory_name"] == "F2") & (perf["department_name"] == "D2")].iloc[0]
+    assert row["shipment_vs_factory_%"] == 50.0
+
+def test_performance_unknown_key():
+    with pytest.raises(ValueError, match="style_no"):
+        kpis.performance(_entries(), ["laundry_name", "style_no"])
+
+def test_laundry_performance_matches_performance():
+    df = _entries()
+    pd.testing.assert_frame_equal(kpis.laundry_performance(df), kpis.performance(df, "laundry_name"))
+
+
+# ----------------- top_issues -----------------
+def test_top_issues_counts_and_limit():
+    df = pd.DataFrame({
+        "laundry_name": ["L1", "L1", "L1", "L2"],
+        "issue_1": ["Shade", "Shade", "Hole", "Hole"],
+        "issue_2": ["Hole", "", "Spot", ""],
+        "issue_3": ["", "", "Stain", ""],
+        "other_issue_text": ["", "  Shade ", "", ""],
+    })
+    top = kpis.top_issues(df, n=2)
+    assert top.to_dict("records") == [
+        {"laundry_name": "L1", "issue": "Shade", "count": 3},
+        {"laundry_name": "L1", "issue": "Hole", "count": 2},
+        {"laundry_name": "L2", "issue": "Hole", "count": 1},
+    ]
+
+def test_top_issues_ignores_nan_and_none():
+    df = pd.DataFrame({
+        "laundry_name": ["L1", None, "L1"],
+        "issue_1": ["Shade", np.nan, None],
+        "issue_2": [np.nan, "Hole", ""],
+        "issue_3": [None, None, None],
+        "other_issue_text": [np.nan, np.nan, np.nan],
+    })
+    top = kpis.top_issues(df)
+    assert top.to_dict("records") == [
+        {"laundry_name": "", "issue": "Hole", "count": 1},
+        {"laundry_name": "L1", "issue": "Shade", "count": 1},
+    ]
+
+def test_top_issues_all_blank():
+    df = pd.DataFrame({"laundry_name": ["L1"], "issue_1": [np.nan], "issue_2": [""]})
+    top = kpis.top_issues(df)
+    assert top.empty
+    assert list(top.columns) == ["laundry_name", "issue", "count"]
+
+def test_top_issues_missing_issue_columns():
+    df = pd.DataFrame({"laundry_name": ["L1"], "issue_2": ["Shade"]})
+    assert kpis.top_issues(df).to_dict("records") == [{"laundry_name": "L1", "issue": "Shade", "count": 1}]
+
+    top = kpis.top_issues(pd.DataFrame({"laundry_name": ["L1"]}))
+    assert top.empty
+    assert list(top.columns) == ["laundry_name", "issue", "count"]
+
+def test_top_issues_missing_group_column():
+    top = kpis.top_issues(pd.DataFrame({"issue_1": ["Shade"]}), by="factory_name")
+    assert top.to_dict("records") == [{"factory_name": "", "issue": "Shade", "count": 1}]
+
+def test_top_issues_empty_frame():
+    top = kpis.top_issues(pd.DataFrame(), by="customer_name")
+    assert top.empty
+    assert list(top.columns) == ["customer_name", "issue", "count"]
+
+def test_top_issues_by_other_key():
+    df = pd.DataFrame({
+        "laundry_name": ["L1", "L2"],
+        "factory_name": ["F1", "F1"],
+        "issue_1": ["Shade", "Shade"],
+    })
+    assert kpis.top_issues(df, by="factory_name").to_dict("records") == [
+        {"factory_name": "F1", "issue": "Shade", "count": 2},
+    ]